@@ -1,2 +1,2 @@
 export PYTHONPATH=$PYTHONPATH:$(pwd)/src
-python3 src/main.py
+python3 src/main.py "$@"
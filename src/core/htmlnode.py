@@ -17,6 +17,9 @@ class HTMLNode:
         ValueError: If tag is not a string, value is not a string, children is not a list, a child in children is not an instance of HTMLNode, or props is not a dictionary.
     """
 
+    # a node is created for every piece of text, so skip the per-instance dict
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: Optional[str] = None,
@@ -65,11 +68,7 @@ class HTMLNode:
         Returns:
             str: The HTML attribute string.
         """
-        html = ""
-        if self.props:
-            for prop, value in self.props.items():
-                html += '{}="{}" '.format(prop, value)
-        return html.rstrip()
+        return " ".join([f'{prop}="{value}"' for prop, value in self.props.items()])
 
     def __repr__(self, indent: int = 0) -> str:
         """
@@ -123,6 +122,8 @@ class LeafNode(HTMLNode):
         ValueError: If the tag is missing and the value is not provided, or if the value is an empty string.
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         value: str,
@@ -143,14 +144,12 @@ class LeafNode(HTMLNode):
         if not self.tag:
             return self.value
         elif not self.props:
-            return "<{}>{}</{}>".format(self.tag, self.value, self.tag)
+            return f"<{self.tag}>{self.value}</{self.tag}>"
         elif self.tag and self.props:
             if self.tag == "img":
-                return "<{} {}{} />".format(self.tag, self.props_to_html(), self.value)
+                return f"<{self.tag} {self.props_to_html()}{self.value} />"
             else:
-                return "<{} {}>{}</{}>".format(
-                    self.tag, self.props_to_html(), self.value, self.tag
-                )
+                return f"<{self.tag} {self.props_to_html()}>{self.value}</{self.tag}>"
 
 
 class ParentNode(HTMLNode):
@@ -166,6 +165,8 @@ class ParentNode(HTMLNode):
         ValueError: If the tag is missing or if children nodes are not provided.
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         children: Optional[List["HTMLNode"]],
@@ -187,12 +188,10 @@ class ParentNode(HTMLNode):
         """
         if self.tag is None:
             raise ValueError("Tag must be provided for ParentNode")
-        html_string = "<{}".format(self.tag)
         if self.props:
-            html_string += " {}>".format(self.props_to_html())
+            parts = [f"<{self.tag} {self.props_to_html()}>"]
         else:
-            html_string += ">"
-        for child in self.children:
-            html_string += child.to_html()
-        html_string += "</{}>".format(self.tag)
-        return html_string
+            parts = [f"<{self.tag}>"]
+        parts.extend([child.to_html() for child in self.children])
+        parts.append(f"</{self.tag}>")
+        return "".join(parts)
@@ -0,0 +1,126 @@
+import os
+import shutil
+import hashlib
+import functools
+from pathlib import Path
+from typing import Iterable
+from src.core import htmlnode, markdown_functions, text_functions, textnode
+from src.core.markdown_functions import markdown_to_html_string
+
+CACHE_DIR_NAME: str = ".pyssg-cache"
+
+
+def renderer_version() -> str:
+    """
+    Compute a version of the markdown renderer from the source of every module
+    taking part in the rendering, so that it changes along with the output.
+
+    Returns:
+    str: A short hex digest of the renderer source.
+    """
+    digest = hashlib.sha256()
+    for module in (markdown_functions, text_functions, htmlnode, textnode):
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+# cached entries are stored per renderer version, so that HTML rendered by
+# another version of the renderer is never served
+CACHE_VERSION: str = renderer_version()
+
+
+def cache_key(body: str) -> str:
+    """
+    Compute the name of the cache entry of a markdown body.
+
+    Parameters:
+    body (str): The raw markdown content.
+
+    Returns:
+    str: The file name of the cache entry within its version directory.
+    """
+    return f"{hashlib.sha256(body.encode()).hexdigest()[:16]}.html"
+
+
+@functools.lru_cache(maxsize=4096)
+def md_to_html_cached(body: str, cache_dir: str) -> str:
+    """
+    Convert a markdown body to HTML, reusing a previously rendered result when
+    the exact same body has already been converted.
+
+    Rendered HTML is stored on disk in a `CACHE_VERSION` directory of
+    `cache_dir` under a key derived from the SHA-256 digest of the markdown
+    body, so unchanged files skip the markdown parsing entirely on subsequent
+    builds. Calls within the same process are additionally memoized in memory.
+
+    Entries are written to a temporary file first which then replaces the
+    entry, so that other worker processes never read a half written entry.
+
+    Parameters:
+    body (str): The raw markdown content to convert.
+    cache_dir (str): The directory where rendered HTML fragments are stored.
+
+    Returns:
+    str: The HTML representation of the markdown body.
+
+    Raises:
+    ValueError: If the markdown body is empty or has invalid syntax.
+    """
+    version_dir = os.path.join(cache_dir, CACHE_VERSION)
+    cache_file = os.path.join(version_dir, cache_key(body))
+
+    if os.path.isfile(cache_file):
+        return Path(cache_file).read_bytes().decode("utf-8")
+
+    html_content = markdown_to_html_string(body)
+
+    os.makedirs(version_dir, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    Path(tmp_file).write_bytes(html_content.encode("utf-8"))
+    os.replace(tmp_file, cache_file)
+
+    return html_content
+
+
+def prune_cache(cache_dir: str, bodies: Iterable[str]) -> None:
+    """
+    Remove the cached entries which are not the current rendering of any of
+    the given markdown bodies: entries of other renderer versions, of bodies
+    which were edited or deleted since, and leftover temporary files.
+
+    Parameters:
+    cache_dir (str): The directory where rendered HTML fragments are stored.
+    bodies (Iterable[str]): The raw markdown content of every page.
+
+    Returns: None
+    """
+    if not os.path.isdir(cache_dir):
+        return
+
+    keep = {cache_key(body) for body in bodies}
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            if entry.name == CACHE_VERSION and entry.is_dir():
+                with os.scandir(entry.path) as cached_entries:
+                    for cached in cached_entries:
+                        if cached.name not in keep:
+                            os.remove(cached.path)
+            elif entry.is_dir():
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+
+
+def clean_cache(cache_dir: str) -> None:
+    """
+    Remove the on-disk markdown cache directory along with all cached entries.
+
+    Parameters:
+    cache_dir (str): The directory where rendered HTML fragments are stored.
+
+    Returns: None
+    """
+    md_to_html_cached.cache_clear()
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+        print(f"Deleting {cache_dir}")
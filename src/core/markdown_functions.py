@@ -1,6 +1,10 @@
+import os
 import re
-from typing import List, Tuple
-from src.core.htmlnode import ParentNode, LeafNode
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Iterator, Dict, Callable
+from src.core.htmlnode import HTMLNode, ParentNode, LeafNode
 from src.core.textnode import TextNode
 import src.core.text_functions as tf
 
@@ -11,6 +15,64 @@ BLOCK_TYPE_QUOTE = "quote"
 BLOCK_TYPE_UNORD_LIST = "unordered_list"
 BLOCK_TYPE_ORD_LIST = "ordered_list"
 
+ORD_LIST_ITEM_RE = re.compile(r"\d+\.\s")
+BLANK_LINES_RE = re.compile(r"\n\n+")
+
+# block count above which a single document is rendered in a process pool,
+# below it the pool start-up costs more than the rendering itself
+PARALLEL_BLOCKS_THRESHOLD = 512
+
+
+def scan_markdown_references(text: str, opener: str) -> List[Tuple[str, str]]:
+    """
+    Find every `<opener>text](url)` reference in a text with a linear scan.
+
+    Matches the same references, in the same order, as the non-greedy pattern
+    `<opener>(.*?)\\]\\((.*?)\\)` would: neither part spans a line break, the
+    text ends at the first "](" and the url at the next ")". A "[" opener
+    preceded by "!" starts an image rather than a link, so it is skipped like
+    the `(?<!!)` lookbehind would. When a line holds no complete reference
+    after an opener, no later opener on that line can start one either, so
+    the scan moves on to the next line.
+
+    Args:
+        text (str): The input text containing markdown references.
+        opener (str): The characters opening a reference, "![" or "[".
+
+    Returns:
+        List[Tuple[str, str]]: A list of (text, url) tuples.
+    """
+    references = list()
+    if "](" not in text:
+        return references
+
+    text_length = len(text)
+    pos = 0
+    line_end = -1
+    while True:
+        start = text.find(opener, pos)
+        if start == -1:
+            return references
+        if opener == "[" and start and text[start - 1] == "!":
+            pos = start + 1
+            continue
+        if start > line_end:
+            line_end = text.find("\n", start)
+            if line_end == -1:
+                line_end = text_length
+
+        text_start = start + len(opener)
+        separator = text.find("](", text_start, line_end)
+        close = -1
+        if separator != -1:
+            close = text.find(")", separator + 2, line_end)
+        if close == -1:
+            pos = line_end + 1
+            continue
+
+        references.append((text[text_start:separator], text[separator + 2 : close]))
+        pos = close + 1
+
 
 def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
     """
@@ -26,12 +88,12 @@ def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
         >>> extract_markdown_images("This is an image ![alt text](http://example.com/image.jpg).")
         [('alt text', 'http://example.com/image.jpg')]
     """
-    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    return scan_markdown_references(text, "![")
 
 
 def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
     """
-    Extract all markdown links from a given text.
+    Extract all markdown links from a given text, images excluded.
 
     Args:
         text (str): The input text containing markdown links.
@@ -43,94 +105,176 @@ def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
         >>> extract_markdown_links("This is a [link](http://example.com).")
         [('link', 'http://example.com')]
     """
-    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+    return scan_markdown_references(text, "[")
 
 
-def get_codeblock_indices(text: str) -> List[Tuple[int, int]]:
+def iter_markdown_blocks(text: str) -> Iterator[str]:
     """
-    Identify the start and end indices of all code blocks in a Markdown string.
+    Lazily split a raw Markdown string into block strings in a single pass.
 
-    This function searches for code blocks in the provided Markdown text. Code blocks
-    are defined as text wrapped in triple backticks (```).
+    The text is walked line by line. A line starting with triple backticks
+    (```) opens a code block which is kept verbatim up to the next line
+    starting with triple backticks; anything following the closing backticks
+    on that line is treated as regular text. Every other line is stripped of
+    leading and trailing whitespace and consecutive non-empty lines are grouped
+    into a block, blank lines separating the blocks. A code block that is never
+    closed is treated as regular text.
 
     Parameters:
     text (str): The raw Markdown string representing a full document.
 
-    Returns:
-    List[Tuple[int, int]]: A list of tuples, where each tuple contains the start and
-                           end indices of a code block in the text.
+    Yields:
+    str: The next block string, code blocks included.
     """
-    indices = list()
-    matches = re.finditer(r"^`{3}\n?[\s\S]*?\n?^`{3}", text, re.MULTILINE)
-    for match in matches:
-        indices.append((match.start(0), match.end(0)))
-    return indices
+    if "```" not in text:
+        # without code blocks, once every line is stripped the blocks are
+        # simply separated by runs of empty lines
+        text = "\n".join([line.strip() for line in text.split("\n")]).strip("\n")
+        if text:
+            yield from BLANK_LINES_RE.split(text)
+        return
+
+    block_lines = list()
+    code_lines = None
+
+    for line in text.split("\n"):
+        if code_lines is None and line.startswith("```"):
+            code_lines = [line]
+            continue
+
+        if code_lines is not None:
+            if not line.startswith("```"):
+                code_lines.append(line)
+                continue
+            if block_lines:
+                yield "\n".join(block_lines)
+                block_lines = list()
+            code_lines.append("```")
+            yield "\n".join(code_lines)
+            code_lines = None
+            line = line[3:]
+
+        stripped_line = line.strip()
+        if stripped_line:
+            block_lines.append(stripped_line)
+        elif block_lines:
+            yield "\n".join(block_lines)
+            block_lines = list()
+
+    # an unterminated code block is just regular text
+    for line in code_lines or []:
+        stripped_line = line.strip()
+        if stripped_line:
+            block_lines.append(stripped_line)
+        elif block_lines:
+            yield "\n".join(block_lines)
+            block_lines = list()
 
+    if block_lines:
+        yield "\n".join(block_lines)
 
-def get_non_codeblocks(text: str) -> List[str]:
+
+def markdown_to_blocks(text: str) -> List[str]:
     """
-    Extract non-code blocks from a given text by splitting on newlines.
+    Convert a raw Markdown string into a list of block strings.
 
-    This function splits the input text into blocks by newlines. It strips any leading
-    or trailing whitespace from each block and removes any empty blocks created by
+    This function splits the input Markdown string into distinct blocks, where each
+    block is separated by one or more newlines. It handles code blocks separately,
+    ensuring they are not split incorrectly, and processes non-code blocks to strip
+    any leading or trailing whitespace and remove any empty blocks created by
     excessive newlines.
 
     Parameters:
-    text (str): The input text string to be split into non-code blocks.
+    text (str): The raw Markdown string representing a full document.
 
     Returns:
-    List[str]: A list of non-code block strings, with leading and trailing whitespace removed.
+    List[str]: A list of block strings, with leading and trailing whitespace removed.
     """
-    blocks = list()
-    lines = text.split("\n")
-    current_block = []
+    return list(iter_markdown_blocks(text))
 
-    def add_block():
-        if current_block:
-            blocks.append("\n".join(current_block).strip())
-            current_block.clear()
 
-    for line in lines:
-        stripped_line = line.strip()
-        if not stripped_line:
-            add_block()
-        else:
-            current_block.append(stripped_line)
+def heading_level(block: str) -> int:
+    """
+    Count the leading '#' characters of a Markdown block.
 
-    add_block()  # Add the last block if there's any
+    Only the start of the block is looked at, and counting stops after 7 '#'
+    characters as anything above 6 is not a heading anyway.
 
-    return blocks
+    Parameters:
+    block (str): A string representing a single block of Markdown text.
 
+    Returns:
+    int: The number of leading '#' characters, capped at 7.
 
-def markdown_to_blocks(text: str) -> List[str]:
+    Examples:
+    >>> heading_level("## Foo # Bar")
+    2
+    >>> heading_level("Paragraph")
+    0
     """
-    Convert a raw Markdown string into a list of block strings.
+    level = 0
+    max_level = min(len(block), 7)
+    while level < max_level and block[level] == "#":
+        level += 1
+    return level
 
-    This function splits the input Markdown string into distinct blocks, where each
-    block is separated by one or more newlines. It handles code blocks separately,
-    ensuring they are not split incorrectly, and processes non-code blocks to strip
-    any leading or trailing whitespace and remove any empty blocks created by
-    excessive newlines.
+
+def classify_markdown_block(block: str) -> Tuple[str, List[str]]:
+    """
+    Determine the type of a Markdown block and strip its block-level syntax in
+    the same pass.
+
+    The first character of the block decides which block type it can be, so
+    only the matching type is verified instead of testing every type in turn.
+    List blocks are walked line by line once, checking each item and removing
+    its delimiter ("* ", "- ", "1. ", ...) at the same time.
 
     Parameters:
-    text (str): The raw Markdown string representing a full document.
+    block (str): A string representing a single block of Markdown text.
 
     Returns:
-    List[str]: A list of block strings, with leading and trailing whitespace removed.
-    """
-    blocks = list()
-    current_pos = 0
-    codeblock_indices = get_codeblock_indices(text)
-    if codeblock_indices:
-        for c_start, c_end in codeblock_indices:
-            blocks.extend(get_non_codeblocks(text[current_pos:c_start]))
-            blocks.append(text[c_start:c_end])
-            current_pos = c_end
-        blocks.extend(get_non_codeblocks(text[current_pos:]))
-    else:
-        blocks = get_non_codeblocks(text)
+    Tuple[str, List[str]]: The type of the block and its content. For ordered
+                           and unordered lists the content holds the text of
+                           every item without its delimiter, for every other
+                           block type it holds the block unchanged.
 
-    return blocks
+    Examples:
+    >>> classify_markdown_block("* item 1\n* item 2")
+    ('unordered_list', ['item 1', 'item 2'])
+    >>> classify_markdown_block("# Heading")
+    ('heading', ['# Heading'])
+    """
+    if not block:
+        return BLOCK_TYPE_PARAGRAPH, [block]
+
+    first_char = block[0]
+    if first_char == "#":
+        level = heading_level(block)
+        if level <= 6 and level < len(block) and block[level].isspace():
+            return BLOCK_TYPE_HEADING, [block]
+    elif first_char == "`":
+        if block.startswith("```") and block.endswith("```"):
+            return BLOCK_TYPE_CODE, [block]
+    elif first_char == ">":
+        # every line is quoted when every line break is followed by a ">"
+        if block.count("\n") == block.count("\n>"):
+            return BLOCK_TYPE_QUOTE, [block]
+    elif first_char in "*-":
+        items = list()
+        for line in block.split("\n"):
+            if len(line) < 2 or line[0] not in "*-" or not line[1].isspace():
+                return BLOCK_TYPE_PARAGRAPH, [block]
+            items.append(line[2:])
+        return BLOCK_TYPE_UNORD_LIST, items
+    elif first_char.isdecimal():
+        items = list()
+        for i, line in enumerate(block.split("\n")):
+            number, _, item = line.partition(".")
+            if not number.isdecimal() or not item[:1].isspace() or int(number) != i + 1:
+                return BLOCK_TYPE_PARAGRAPH, [block]
+            items.append(item[1:])
+        return BLOCK_TYPE_ORD_LIST, items
+    return BLOCK_TYPE_PARAGRAPH, [block]
 
 
 def get_markdown_block_type(block: str) -> str:
@@ -166,21 +310,7 @@ def get_markdown_block_type(block: str) -> str:
     >>> block_to_block_type("Just a paragraph.")
     'paragraph'
     """
-    if re.match(r"^#{1,6}\s", block):
-        return BLOCK_TYPE_HEADING
-    elif block.startswith("```") and block.endswith("```"):
-        return BLOCK_TYPE_CODE
-    elif all(line.startswith(">") for line in block.split("\n")):
-        return BLOCK_TYPE_QUOTE
-    elif all(re.match(r"^[*-]\s", line) for line in block.split("\n")):
-        return BLOCK_TYPE_UNORD_LIST
-    elif all(re.match(r"^\d+\.\s", line) for line in block.split("\n")):
-        lines = block.split("\n")
-        for i, line in enumerate(lines):
-            if int(line.split(".")[0]) != i + 1:
-                return BLOCK_TYPE_PARAGRAPH
-        return BLOCK_TYPE_ORD_LIST
-    return BLOCK_TYPE_PARAGRAPH
+    return classify_markdown_block(block)[0]
 
 
 def markdown_heading_to_text_node(text: str) -> List[TextNode]:
@@ -188,7 +318,7 @@ def markdown_heading_to_text_node(text: str) -> List[TextNode]:
     Convert a Markdown heading line to a list of TextNode objects.
 
     This function checks if the input text is a Markdown heading (denoted by 1 to 6 leading '#' characters followed by a space).
-    If it is a heading, the '#' characters are removed, and the remaining text is processed. If it is not a heading, the text
+    If it is a heading, the leading '#' characters are removed, and the remaining text is processed. If it is not a heading, the text
     is processed as is.
 
     Args:
@@ -197,8 +327,9 @@ def markdown_heading_to_text_node(text: str) -> List[TextNode]:
     Returns:
         List[TextNode]: A list of TextNode objects representing the input text.
     """
-    if re.match(r"^#{1,6}\s", text):
-        return tf.text_line_to_text_nodes(text=text.replace("#", "").lstrip())
+    level = heading_level(text)
+    if 1 <= level <= 6 and text[level : level + 1].isspace():
+        return tf.text_line_to_text_nodes(text=text[level + 1 :].lstrip())
     else:
         return tf.text_line_to_text_nodes(text=text)
 
@@ -221,7 +352,19 @@ def markdown_quote_to_text_node(text: str) -> List[TextNode]:
     """
     if text == "> ":
         raise NotImplementedError("Empty quotes not supported")
-    return tf.text_line_to_text_nodes(re.sub(r"^>\s", "", text, flags=re.MULTILINE))
+
+    lines = text.split("\n")
+    last_ix = len(lines) - 1
+    stripped_lines = list()
+    for ix, line in enumerate(lines):
+        if line.startswith(">"):
+            if len(line) > 1 and line[1].isspace():
+                line = line[2:]
+            elif len(line) == 1 and ix < last_ix:
+                # a bare ">" swallows its line break, joining the next line
+                continue
+        stripped_lines.append(line)
+    return tf.text_line_to_text_nodes("\n".join(stripped_lines))
 
 
 def markdown_unord_list_to_text_node(text: str) -> List[List[TextNode]]:
@@ -240,13 +383,18 @@ def markdown_unord_list_to_text_node(text: str) -> List[List[TextNode]]:
     Raises:
         NotImplementedError: If the unordered list contains an empty item.
     """
-    nodes = list()
-    text_without_delimiter = re.sub(r"^[*-]\s", "", text, flags=re.MULTILINE)
-    for line in text_without_delimiter.split("\n"):
-        if not line:
-            raise NotImplementedError("Empty lists not supported")
-        nodes.append(tf.text_line_to_text_nodes(line))
-    return nodes
+    lines = text.split("\n")
+    last_ix = len(lines) - 1
+    items = list()
+    for ix, line in enumerate(lines):
+        if line[:1] in ("*", "-"):
+            if len(line) > 1 and line[1].isspace():
+                line = line[2:]
+            elif len(line) == 1 and ix < last_ix:
+                # a bare delimiter swallows its line break, joining the next line
+                continue
+        items.append(line)
+    return markdown_list_items_to_text_node(items=items)
 
 
 def markdown_ord_list_to_text_node(text: str) -> List[List[TextNode]]:
@@ -265,12 +413,46 @@ def markdown_ord_list_to_text_node(text: str) -> List[List[TextNode]]:
     Raises:
         NotImplementedError: If the ordered list contains an empty item.
     """
+    lines = text.split("\n")
+    last_ix = len(lines) - 1
+    items = list()
+    for ix, line in enumerate(lines):
+        match = ORD_LIST_ITEM_RE.match(line)
+        if match:
+            line = line[match.end() :]
+        elif ix < last_ix and line.endswith(".") and line[:-1].isdecimal():
+            # a bare delimiter swallows its line break, joining the next line
+            continue
+        items.append(line)
+    return markdown_list_items_to_text_node(items=items)
+
+
+def markdown_list_items_to_text_node(items: List[str]) -> List[List[TextNode]]:
+    """
+    Convert the items of a Markdown list, already stripped of their list
+    delimiters, to a list of lists of TextNode objects.
+
+    Args:
+        items (List[str]): The text of every list item.
+
+    Returns:
+        List[List[TextNode]]: A list of lists of TextNode objects representing the text in the list.
+
+    Raises:
+        NotImplementedError: If the list contains an empty item.
+    """
+    try:
+        return tf.text_lines_to_text_nodes(lines=items)
+    except (ValueError, NotImplementedError):
+        # convert the items one by one to raise the error of the first
+        # invalid item
+        pass
+
     nodes = list()
-    text_without_delimiter = re.sub(r"^\d+\.\s", "", text, flags=re.MULTILINE)
-    for line in text_without_delimiter.split("\n"):
-        if not line:
+    for item in items:
+        if not item:
             raise NotImplementedError("Empty lists not supported")
-        nodes.append(tf.text_line_to_text_nodes(line))
+        nodes.append(tf.text_line_to_text_nodes(item))
     return nodes
 
 
@@ -290,6 +472,61 @@ def markdown_paragraph_to_text_node(text: str) -> List[TextNode]:
     return tf.text_line_to_text_nodes(text=text)
 
 
+def text_nodes_to_parent_node(text_nodes: List[TextNode], tag: str) -> ParentNode:
+    """
+    Wrap the HTML nodes of a list of TextNode objects into a single tag.
+
+    Args:
+        text_nodes (List[TextNode]): The TextNode objects to convert.
+        tag (str): The tag of the parent node.
+
+    Returns:
+        ParentNode: A ParentNode with the converted text nodes as children.
+    """
+    return ParentNode(
+        children=[tf.text_node_to_html_node(node) for node in text_nodes], tag=tag
+    )
+
+
+def list_items_to_parent_node(items: List[str], tag: str) -> ParentNode:
+    """
+    Wrap Markdown list items into `li` nodes within a single list tag.
+
+    Args:
+        items (List[str]): The list items, without their markers.
+        tag (str): The tag of the list, `ul` or `ol`.
+
+    Returns:
+        ParentNode: A ParentNode with an `li` child per list item.
+    """
+    return ParentNode(
+        children=[
+            text_nodes_to_parent_node(nodes, "li")
+            for nodes in markdown_list_items_to_text_node(items=items)
+        ],
+        tag=tag,
+    )
+
+
+# builds the HTML node of a block from the block and its classified content
+BLOCK_TYPE_TO_HTML_NODE: Dict[str, Callable[[str, List[str]], HTMLNode]] = {
+    BLOCK_TYPE_PARAGRAPH: lambda block, _: text_nodes_to_parent_node(
+        markdown_paragraph_to_text_node(text=block), "p"
+    ),
+    BLOCK_TYPE_HEADING: lambda block, _: text_nodes_to_parent_node(
+        markdown_heading_to_text_node(text=block), f"h{heading_level(block)}"
+    ),
+    # dedicated function not needed as we want to reserve the raw text
+    # within the code blocks
+    BLOCK_TYPE_CODE: lambda block, _: LeafNode(value=block[3:-3], tag="pre"),
+    BLOCK_TYPE_QUOTE: lambda block, _: text_nodes_to_parent_node(
+        markdown_quote_to_text_node(text=block), "blockquote"
+    ),
+    BLOCK_TYPE_UNORD_LIST: lambda _, content: list_items_to_parent_node(content, "ul"),
+    BLOCK_TYPE_ORD_LIST: lambda _, content: list_items_to_parent_node(content, "ol"),
+}
+
+
 def markdown_to_html_node(text: str) -> ParentNode:
     """
     Convert Markdown text to a ParentNode object representing the HTML structure.
@@ -309,73 +546,113 @@ def markdown_to_html_node(text: str) -> ParentNode:
         raise ValueError("Empty markdown input")
 
     nodes = list()
-    markdown_blocks = markdown_to_blocks(text=text)
-    markdown_block_types = [get_markdown_block_type(block) for block in markdown_blocks]
-
-    for ix, block in enumerate(markdown_blocks):
-        if markdown_block_types[ix] == BLOCK_TYPE_PARAGRAPH:
-            nodes.append(
-                ParentNode(
-                    children=[
-                        tf.text_node_to_html_node(node)
-                        for node in markdown_paragraph_to_text_node(text=block)
-                    ],
-                    tag="p",
-                )
-            )
-        elif markdown_block_types[ix] == BLOCK_TYPE_HEADING:
-            nodes.append(
-                ParentNode(
-                    children=[
-                        tf.text_node_to_html_node(node)
-                        for node in markdown_heading_to_text_node(text=block)
-                    ],
-                    tag="h{}".format(block.count("#")),
-                )
-            )
-        elif markdown_block_types[ix] == BLOCK_TYPE_CODE:
-            # dedicated function not needed as we want to reserve the raw text
-            # within the code blocks
-            nodes.append(LeafNode(value=block[3:-3], tag="pre"))
-        elif markdown_block_types[ix] == BLOCK_TYPE_QUOTE:
-            nodes.append(
-                ParentNode(
-                    children=[
-                        tf.text_node_to_html_node(node)
-                        for node in markdown_quote_to_text_node(text=block)
-                    ],
-                    tag="blockquote",
-                )
-            )
-        elif markdown_block_types[ix] == BLOCK_TYPE_UNORD_LIST:
-            nodes.append(
-                ParentNode(
-                    children=[
-                        ParentNode(
-                            children=[
-                                tf.text_node_to_html_node(node) for node in nodes
-                            ],
-                            tag="li",
-                        )
-                        for nodes in markdown_unord_list_to_text_node(text=block)
-                    ],
-                    tag="ul",
-                )
-            )
-        elif markdown_block_types[ix] == BLOCK_TYPE_ORD_LIST:
-            nodes.append(
-                ParentNode(
-                    children=[
-                        ParentNode(
-                            children=[
-                                tf.text_node_to_html_node(node) for node in nodes
-                            ],
-                            tag="li",
-                        )
-                        for nodes in markdown_ord_list_to_text_node(text=block)
-                    ],
-                    tag="ol",
+    for block in markdown_to_blocks(text=text):
+        block_type, block_content = classify_markdown_block(block)
+        nodes.append(BLOCK_TYPE_TO_HTML_NODE[block_type](block, block_content))
+
+    return ParentNode(children=nodes, tag="div")
+
+
+@functools.lru_cache(maxsize=2048)
+def render_markdown_block(block: str) -> str:
+    """
+    Classify a single Markdown block and convert it to an HTML string, through
+    the same BLOCK_TYPE_TO_HTML_NODE dispatch as markdown_to_html_node.
+
+    Conversions are memoized since blocks (navigation links, footers, notes,
+    ...) tend to repeat verbatim across the pages of a site.
+
+    Args:
+        block (str): The Markdown block to convert.
+
+    Returns:
+        str: The HTML representation of the block.
+    """
+    block_type, block_content = classify_markdown_block(block)
+    return BLOCK_TYPE_TO_HTML_NODE[block_type](block, block_content).to_html()
+
+
+def iter_markdown_html(text: str) -> Iterator[str]:
+    """
+    Convert Markdown text to HTML, yielding the HTML of one block at a time.
+
+    The concatenation of the yielded chunks equals `markdown_to_html_string(text)`,
+    which lets callers write a page out without holding its whole HTML in memory.
+
+    Args:
+        text (str): The Markdown text to be converted.
+
+    Yields:
+        str: The opening tag of the wrapping div, the HTML of every block, and
+        the closing tag of the div.
+
+    Raises:
+        ValueError: If the markdown input is empty or has invalid syntax.
+    """
+    if not text:
+        raise ValueError("Empty markdown input")
+
+    blocks = iter_markdown_blocks(text=text)
+    first_block = next(blocks, None)
+    if first_block is None:
+        raise ValueError("No markdown blocks found")
+
+    yield "<div>"
+    yield render_markdown_block(first_block)
+    for block in blocks:
+        yield render_markdown_block(block)
+    yield "</div>"
+
+
+def markdown_to_html_string(text: str) -> str:
+    """
+    Convert Markdown text directly to an HTML string.
+
+    Produces the same output as `markdown_to_html_node(text).to_html()` but
+    appends the HTML fragments of every block to a list joined at the end,
+    without building a tree for the whole document. Documents
+    with more than PARALLEL_BLOCKS_THRESHOLD blocks have their blocks rendered
+    in a process pool, the output order is preserved.
+
+    Args:
+        text (str): The Markdown text to be converted.
+
+    Returns:
+        str: The HTML representation of the input Markdown text.
+
+    Raises:
+        ValueError: If the markdown input is empty or has invalid syntax.
+    """
+    if not text:
+        raise ValueError("Empty markdown input")
+
+    blocks = markdown_to_blocks(text=text)
+    if not blocks:
+        raise ValueError("No markdown blocks found")
+
+    # repeated blocks only need to be rendered, and sent to a worker, once
+    unique_blocks = list(dict.fromkeys(blocks))
+    max_workers = os.cpu_count() or 1
+    # pages are already rendered in worker processes by generate_page_recursive,
+    # only fan out when running in the main process
+    if (
+        len(unique_blocks) > PARALLEL_BLOCKS_THRESHOLD
+        and max_workers > 1
+        and multiprocessing.parent_process() is None
+    ):
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rendered_blocks = dict(
+                zip(
+                    unique_blocks,
+                    executor.map(
+                        render_markdown_block,
+                        unique_blocks,
+                        chunksize=max(1, len(unique_blocks) // (max_workers * 4)),
+                    ),
                 )
             )
+        fragments = [rendered_blocks[block] for block in blocks]
+    else:
+        fragments = [render_markdown_block(block) for block in blocks]
 
-    return ParentNode(children=nodes, tag="div")
+    return "<div>{}</div>".format("".join(fragments))
@@ -1,9 +1,15 @@
-from http.server import SimpleHTTPRequestHandler
-import socketserver
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 import os
-from typing import Tuple, Set, Callable, List, Dict
+import io
+import stat
+import gzip
+import functools
+import threading
+import time
+import urllib.parse
+from typing import Tuple, Callable, List, Dict, FrozenSet, Optional
 
-from src.core.utils import find_files_rec, find_file_timestamps
+from src.core.utils import find_files_and_stamps_rec, find_file_timestamps
 
 HOSTNAME: str = "localhost"
 PORT: int = 8080
@@ -15,12 +21,26 @@ EXCLUDE_DIRS: List[str] = [
     ".pytest_cache",
     "tests",
     "public",
+    ".pyssg-cache",
 ]
 EXCLUDE_FILES: List[str] = ["README.md", "TODO.md"]
 FILETYPES_TO_MONITOR: List[str] = ["md", "html", "css", "js"]
-
-
-def get_updated_tracked_lists(root_path: str) -> Tuple[List[str], Dict[str, float]]:
+# seconds between two checks for changes on behalf of the /events clients
+RELOAD_CHECK_INTERVAL: float = 1.0
+# seconds after which an idle /events stream is sent a keep-alive comment
+EVENTS_KEEPALIVE_INTERVAL: float = 15.0
+# content types which are sent gzip-compressed to clients accepting it
+COMPRESSIBLE_TYPES: Tuple[str, ...] = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+)
+
+
+def get_updated_tracked_lists(
+    root_path: str,
+) -> Tuple[FrozenSet[str], Dict[str, float]]:
     """
     Retrieves updated lists of tracked files and their timestamps based on
     the specified root path.
@@ -29,36 +49,94 @@ def get_updated_tracked_lists(root_path: str) -> Tuple[List[str], Dict[str, floa
     - root_path (str): The root directory path to monitor.
 
     Returns:
-    - Tuple[List[str], Dict[str, float]]: A tuple containing the updated list
-      of tracked files and their timestamps.
+    - Tuple[FrozenSet[str], Dict[str, float]]: A tuple containing the updated
+      set of tracked files and their timestamps.
     """
-    files = find_files_rec(
+    files, filestamps = find_files_and_stamps_rec(
         path=root_path,
         exclude_dirs=EXCLUDE_DIRS,
         exclude_files=EXCLUDE_FILES,
         filetypes_to_monitor=FILETYPES_TO_MONITOR,
     )
-    filestamps = find_file_timestamps(files)
-    return (files, filestamps)
+    return (frozenset(files), filestamps)
+
+
+def find_html_files(public_dir: str) -> FrozenSet[str]:
+    """
+    Retrieves the HTML files of the generated site, which requests for paths
+    without the .html extension are redirected to.
+
+    Args:
+    - public_dir (str): The directory from which public files are served.
+
+    Returns:
+    - FrozenSet[str]: The paths of the HTML files within the public directory.
+    """
+    return frozenset(
+        os.path.join(dirpath, filename)
+        for dirpath, _, filenames in os.walk(public_dir)
+        for filename in filenames
+        if filename.endswith(".html")
+    )
+
+
+def find_dir_timestamps(root_path: str) -> Dict[str, float]:
+    """
+    Retrieves the last modified timestamps of the root path and of every
+    directory below it which is not excluded from monitoring.
+
+    A directory's timestamp changes whenever an entry is added to, removed
+    from or renamed within it, but not when a file within it is modified.
+
+    Args:
+    - root_path (str): The root directory path to monitor.
+
+    Returns:
+    - Dict[str, float]: The last modified timestamp of every monitored directory.
+    """
+    dirstamps = dict()
+    for dirpath, dirnames, _ in os.walk(top=root_path, topdown=True):
+        dirnames[:] = [d for d in dirnames if d not in EXCLUDE_DIRS]
+        dirstamps[dirpath] = os.path.getmtime(dirpath)
+    return dirstamps
+
+
+def are_dirs_modified(tracked_dirstamps: Dict[str, float]) -> bool:
+    """
+    Checks if any tracked directory changed since its timestamp was taken,
+    which only needs one stat per directory instead of a full rescan.
+
+    Args:
+    - tracked_dirstamps (Dict[str, float]): Timestamps of tracked directories.
+
+    Returns:
+    - bool: True if a directory was modified or removed, False otherwise.
+    """
+    for dirpath, dirstamp in tracked_dirstamps.items():
+        try:
+            if os.path.getmtime(dirpath) != dirstamp:
+                return True
+        except FileNotFoundError:
+            return True
+    return False
 
 
 def compare_files(
-    tracked_files: List[str], u_tracked_files: List[str]
-) -> Tuple[Set[str], Set[str]]:
+    tracked_files: FrozenSet[str], u_tracked_files: FrozenSet[str]
+) -> Tuple[FrozenSet[str], FrozenSet[str]]:
     """
     Compares the current tracked files with the updated tracked files
     to identify added and deleted files.
 
     Args:
-    - tracked_files (List[str]): Current list of tracked files.
-    - u_tracked_files (List[str]): Updated list of tracked files.
+    - tracked_files (FrozenSet[str]): Current set of tracked files.
+    - u_tracked_files (FrozenSet[str]): Updated set of tracked files.
 
     Returns:
-    - Tuple[Set[str], Set[str]]: A tuple containing sets of added and deleted files.
+    - Tuple[FrozenSet[str], FrozenSet[str]]: A tuple containing sets of added
+      and deleted files.
     """
-    added_files = set(u_tracked_files) - set(tracked_files)
-    deleted_files = set(tracked_files) - set(u_tracked_files)
-    return added_files, deleted_files
+    return u_tracked_files - tracked_files, tracked_files - u_tracked_files
 
 
 def compare_timestamps(
@@ -75,30 +153,55 @@ def compare_timestamps(
     Returns:
     - set[str]: A set of filenames that have been modified.
     """
-    modified_files = {
-        file
-        for file in tracked_filestamps
-        if tracked_filestamps[file] != u_tracked_filestamps.get(file)
-    }
+    # (file, timestamp) pairs which are no longer current, diffed in C
+    stale_filestamps = tracked_filestamps.items() - u_tracked_filestamps.items()
+    modified_files = {file for file, _ in stale_filestamps}
     return modified_files
 
 
 def is_needed_to_reload(
     root_path: str,
-    tracked_files: List[str],
+    tracked_files: FrozenSet[str],
     tracked_filestamps: Dict[str, float],
+    tracked_dirstamps: Optional[Dict[str, float]] = None,
 ) -> bool:
     """
     Checks if a reload of tracked files is needed based on changes in the file system.
 
+    When the timestamps of the tracked directories are given and none of them
+    changed, no file was added or deleted, so only the tracked files are
+    checked for modifications instead of rescanning the whole tree. Otherwise
+    the tree is rescanned, and if nothing relevant changed `tracked_dirstamps`
+    is refreshed in place so that the next check can skip the rescan again.
+
     Args:
     - root_path (str): The root directory path to monitor.
-    - tracked_files (List[str]): Current list of tracked files.
+    - tracked_files (FrozenSet[str]): Current set of tracked files.
     - tracked_filestamps (Dict[str, float]): Current timestamps of tracked files.
+    - tracked_dirstamps (Optional[Dict[str, float]]): Current timestamps of
+      tracked directories.
 
     Returns:
     - bool: True if a reload is needed, False otherwise.
     """
+    if tracked_dirstamps is not None and not are_dirs_modified(tracked_dirstamps):
+        try:
+            u_tracked_filestamps = find_file_timestamps(tracked_files)
+        except FileNotFoundError:
+            # deleted since the directories were checked, rescan the tree
+            pass
+        else:
+            modified_files = compare_timestamps(
+                tracked_filestamps, u_tracked_filestamps
+            )
+            if modified_files:
+                print("Modified files:", modified_files)
+                return True
+            return False
+
+    if tracked_dirstamps is not None:
+        # taken before the rescan so that changes made during it are not missed
+        u_tracked_dirstamps = find_dir_timestamps(root_path)
     u_tracked_files, u_tracked_filestamps = get_updated_tracked_lists(root_path)
 
     # Check for added or deleted files
@@ -114,14 +217,36 @@ def is_needed_to_reload(
         print("Modified files:", modified_files)
         return True
 
+    if tracked_dirstamps is not None:
+        tracked_dirstamps.clear()
+        tracked_dirstamps.update(u_tracked_dirstamps)
     return False
 
 
+@functools.lru_cache(maxsize=256)
+def gzip_file(path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Reads and gzip-compresses a file, memoized per version of the file.
+
+    Args:
+    - path (str): The path of the file to compress.
+    - mtime_ns (int): The last modified timestamp of the file, in nanoseconds.
+    - size (int): The size of the file, in bytes.
+
+    Returns:
+    - bytes: The compressed content of the file.
+    """
+    with open(path, "rb") as f:
+        return gzip.compress(f.read(), compresslevel=6)
+
+
 class MyHttpRequestHandler(SimpleHTTPRequestHandler):
     """
     Custom HTTP request handler to serve files and handle reload checks.
     """
 
+    etag = None
+
     def __init__(self, *args, directory=None, **kwargs):
         """
         Initializes the HTTP request handler.
@@ -133,13 +258,81 @@ class MyHttpRequestHandler(SimpleHTTPRequestHandler):
         """
         super().__init__(*args, directory=directory, **kwargs)
 
+    def accepts_gzip(self) -> bool:
+        """
+        Checks if the client accepts gzip-compressed responses.
+
+        Returns:
+        - bool: True if gzip is listed in the Accept-Encoding header.
+        """
+        encodings = self.headers.get("Accept-Encoding", "").split(",")
+        return any(e.split(";")[0].strip() == "gzip" for e in encodings)
+
+    def send_head(self):
+        """
+        Sends the headers of a file like SimpleHTTPRequestHandler does, with an
+        ETag for the browser to revalidate its copy against.
+
+        Answers 304 when the copy of the client is current, and sends
+        compressible files gzip-compressed to clients accepting it.
+
+        Returns:
+        - A file object to copy to the client, or None.
+        """
+        self.etag = None
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and urllib.parse.urlsplit(self.path).path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        try:
+            st = os.stat(path)
+        except OSError:
+            return super().send_head()
+        if not stat.S_ISREG(st.st_mode):
+            return super().send_head()
+
+        self.etag = 'W/"{:x}-{:x}"'.format(st.st_mtime_ns, st.st_size)
+        if_none_match = self.headers.get("If-None-Match", "")
+        if self.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            self.send_response(304)
+            self.end_headers()
+            return None
+
+        ctype = self.guess_type(path)
+        if not (ctype.startswith(COMPRESSIBLE_TYPES) and self.accepts_gzip()):
+            return super().send_head()
+
+        try:
+            body = gzip_file(path, st.st_mtime_ns, st.st_size)
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        self.send_response(200)
+        self.send_header("Content-type", ctype)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def end_headers(self):
+        """
+        Adds the caching headers of a served file before ending the headers,
+        so that browsers always revalidate it instead of using a stale copy.
+        """
+        if self.etag is not None:
+            self.send_header("ETag", self.etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
+        super().end_headers()
+
 
 def create_handler(
     root_path: str,
     public_dir: str,
     build_site_handler: Callable[[], None],
-    tracked_files: List[str],
+    tracked_files: FrozenSet[str],
     tracked_filestamps: Dict[str, float],
+    tracked_dirstamps: Optional[Dict[str, float]] = None,
 ) -> type[MyHttpRequestHandler]:
     """
     Creates a custom HTTP request handler class with reload functionality.
@@ -148,9 +341,11 @@ def create_handler(
     - root_path (str): The root directory path to monitor.
     - public_dir (str): The directory from which to serve public files.
     - build_site_handler (Callable[[], None]): The handler function to execute on build.
-    - tracked_files (List[str]): The files the server is tracking for changes
+    - tracked_files (FrozenSet[str]): The files the server is tracking for changes
     - tracked_filestamps (Dict[str, float]): The last modified timestamps for
     the files being tracked
+    - tracked_dirstamps (Optional[Dict[str, float]]): The last modified
+    timestamps for the directories being tracked
 
     Returns:
     - type[MyHttpRequestHandler]: Custom HTTP request handler class.
@@ -161,9 +356,13 @@ def create_handler(
         Custom HTTP request handler class with added reload and redirect functionality.
         """
 
-        # Class variables to store tracked files and timestamps
-        tracked_files = tracked_files
-        tracked_filestamps = tracked_filestamps
+        # Number of rebuilds so far, /events clients wait for it to change
+        build_count = 0
+        build_condition = threading.Condition()
+        watcher = None
+        # Number of connected /events clients, changes are only checked for
+        # while there is at least one
+        listeners = 0
 
         def __init__(self, *args, **kwargs):
             """
@@ -176,33 +375,131 @@ def create_handler(
 
         def log_message(self, format, *args):
             """
-            Overrides default log_message to exclude logging for /check_update requests.
+            Overrides default log_message to exclude logging for /check_update
+            and /events requests.
             """
-            if self.path != "/check_update":
+            if self.path not in ("/check_update", "/events"):
                 super().log_message(format, *args)
 
-        def do_GET(self):
+        @classmethod
+        def reload_if_needed(cls) -> bool:
             """
-            Handles GET requests.
+            Rebuilds the site if a tracked file changed and wakes up the
+            clients waiting on /events.
 
-            If the request path is '/check_update', performs a reload check.
-            Otherwise, redirects requests for tracked files to their new location
-            within the public directory.
+            Returns:
+            - bool: True if the site was rebuilt, False otherwise.
             """
-            if self.path == "/check_update":
-                current_tracked_files = self.__class__.tracked_files
-                current_tracked_filestamps = self.__class__.tracked_filestamps
-
-                if is_needed_to_reload(
-                    self.root_path,
-                    tracked_files=current_tracked_files,
-                    tracked_filestamps=current_tracked_filestamps,
+            with cls.build_condition:
+                if not is_needed_to_reload(
+                    root_path,
+                    tracked_files=cls.tracked_files,
+                    tracked_filestamps=cls.tracked_filestamps,
+                    tracked_dirstamps=cls.tracked_dirstamps,
                 ):
-                    print("Reloaded")
-                    self.__class__.tracked_files, self.__class__.tracked_filestamps = (
-                        get_updated_tracked_lists(self.root_path)
+                    return False
+
+                print("Reloaded")
+                cls.tracked_dirstamps = find_dir_timestamps(root_path)
+                cls.tracked_files, cls.tracked_filestamps = get_updated_tracked_lists(
+                    root_path
+                )
+                build_site_handler()
+                cls.html_files = find_html_files(public_dir)
+                cls.build_count += 1
+                cls.build_condition.notify_all()
+                return True
+
+        @classmethod
+        def watch_for_changes(cls):
+            """
+            Checks for changes once every RELOAD_CHECK_INTERVAL seconds on
+            behalf of all /events clients, and sleeps without checking anything
+            while none is connected.
+            """
+            while True:
+                with cls.build_condition:
+                    cls.build_condition.wait_for(lambda: cls.listeners > 0)
+                time.sleep(RELOAD_CHECK_INTERVAL)
+                try:
+                    cls.reload_if_needed()
+                except Exception as e:
+                    print(f"Failed to rebuild the site: {e}")
+
+        @classmethod
+        def start_watcher(cls):
+            """
+            Starts the thread watching for changes, unless already started.
+
+            It is only started by the first /events client so that pages still
+            polling /check_update keep seeing the changes themselves.
+            """
+            with cls.build_condition:
+                if cls.watcher is None:
+                    cls.watcher = threading.Thread(
+                        target=cls.watch_for_changes, daemon=True
                     )
-                    self.build_site_handler()
+                    cls.watcher.start()
+
+        @classmethod
+        def count_listener(cls, delta: int):
+            """
+            Updates the number of connected /events clients, waking up the
+            watcher when the first one connects.
+
+            Args:
+            - delta (int): 1 when a client connects, -1 when it disconnects.
+            """
+            with cls.build_condition:
+                cls.listeners += delta
+                cls.build_condition.notify_all()
+
+        def send_update_events(self):
+            """
+            Streams a server-sent `update` event once the site has been rebuilt.
+
+            The stream is kept open until then, with a keep-alive comment sent
+            every EVENTS_KEEPALIVE_INTERVAL seconds so that closed connections
+            are noticed.
+            """
+            self.start_watcher()
+            with self.build_condition:
+                seen_build_count = self.build_count
+
+            self.count_listener(1)
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                while True:
+                    with self.build_condition:
+                        is_rebuilt = self.build_condition.wait_for(
+                            lambda: self.build_count != seen_build_count,
+                            timeout=EVENTS_KEEPALIVE_INTERVAL,
+                        )
+                    if is_rebuilt:
+                        self.wfile.write(b"data: update\n\n")
+                        return
+                    self.wfile.write(b": keep-alive\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                self.count_listener(-1)
+
+        def do_GET(self):
+            """
+            Handles GET requests.
+
+            If the request path is '/events', streams an event once the site
+            is rebuilt. If it is '/check_update', performs a reload check, which
+            is kept for pages still polling it. Otherwise, redirects requests
+            for tracked files to their new location within the public directory.
+            """
+            if self.path == "/events":
+                self.send_update_events()
+            elif self.path == "/check_update":
+                if self.reload_if_needed():
                     self.send_response(200)
                     self.end_headers()
                     self.wfile.write(b"update")
@@ -213,8 +510,8 @@ def create_handler(
                 # Construct the requested file path within public_dir
                 requested_file_path = self.translate_path(self.path) + ".html"
 
-                # Check if the requested file path exists
-                if os.path.exists(requested_file_path):
+                # Check if the requested file path exists in the generated site
+                if requested_file_path in self.html_files:
                     # Construct the redirect URL
                     redirect_url = f"http://{HOSTNAME}:{PORT}/{os.path.relpath(requested_file_path, self.public_dir)}"
                     self.send_response(301)
@@ -234,6 +531,12 @@ def create_handler(
             self.__shutdown_request = True
             self.__is_shut_down.wait()
 
+    # Class variables to store tracked files and timestamps, set here since
+    # the class body would look the names up in the module globals
+    CustomHandler.tracked_files = tracked_files
+    CustomHandler.tracked_filestamps = tracked_filestamps
+    CustomHandler.tracked_dirstamps = tracked_dirstamps
+    CustomHandler.html_files = find_html_files(public_dir)
     return CustomHandler
 
 
@@ -246,9 +549,8 @@ def run(root_path: str, public_dir: str, build_site_handler: Callable[[], None])
     - public_dir (str): The directory from which to serve public files.
     - build_site_handler (Callable[[], None]): The handler function to execute for build.
     """
-    global HOSTNAME, PORT, tracked_files, tracked_filestamps
-
-    # Initialize tracked files and timestamps
+    # Initialize tracked directories, files and timestamps
+    tracked_dirstamps = find_dir_timestamps(root_path)
     tracked_files, tracked_filestamps = get_updated_tracked_lists(root_path)
 
     # Execute the build handler function
@@ -261,15 +563,15 @@ def run(root_path: str, public_dir: str, build_site_handler: Callable[[], None])
         build_site_handler=build_site_handler,
         tracked_files=tracked_files,
         tracked_filestamps=tracked_filestamps,
+        tracked_dirstamps=tracked_dirstamps,
     )
 
-    # Start TCP server
-    with socketserver.TCPServer(
-        (HOSTNAME, PORT), TCPHandler, bind_and_activate=False
-    ) as httpd:
-        httpd.allow_reuse_address = True
-        httpd.server_bind()
-        httpd.server_activate()
+    # Start TCP server, serving every request in its own thread so that open
+    # /events streams and reload checks don't hold up loading the pages.
+    # HTTPServer already binds with allow_reuse_address set.
+    with ThreadingHTTPServer((HOSTNAME, PORT), TCPHandler) as httpd:
+        # don't wait for open /events streams when shutting down
+        httpd.daemon_threads = True
         print("Serving at http://{}:{}".format(HOSTNAME, PORT))
         try:
             httpd.serve_forever()
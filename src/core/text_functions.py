@@ -1,4 +1,6 @@
-from typing import List
+import re
+import functools
+from typing import Callable, Dict, List, Optional, Tuple
 from src.core.htmlnode import LeafNode
 from src.core.textnode import TextNode
 import src.core.markdown_functions as mf
@@ -10,11 +12,44 @@ TEXT_TYPE_CODE = "code"
 TEXT_TYPE_LINK = "link"
 TEXT_TYPE_IMAGE = "image"
 
-
+# separates the lines of text_lines_to_text_nodes, the split functions pass it
+# through untouched as it is not of TEXT_TYPE_TEXT and holds no delimiter
+LINE_SEPARATOR_NODE = TextNode(text="\n", text_type="line_separator")
+
+# characters at which inline markdown can start
+INLINE_MARKUP_RE = re.compile(r"[!\[*`]")
+# characters which delimited or reference texts must not hold to be tokenized
+NESTED_MARKUP_CHARS = frozenset("[]*`")
+DELIMITER_TEXT_TYPES = {
+    "**": TEXT_TYPE_BOLD,
+    "*": TEXT_TYPE_ITALIC,
+    "`": TEXT_TYPE_CODE,
+}
+
+# builds the LeafNode of each text type
+TEXT_TYPE_TO_HTML_NODE: Dict[str, Callable[[TextNode], LeafNode]] = {
+    TEXT_TYPE_TEXT: lambda node: LeafNode(value=node.text),
+    TEXT_TYPE_BOLD: lambda node: LeafNode(value=node.text, tag="b"),
+    TEXT_TYPE_ITALIC: lambda node: LeafNode(value=node.text, tag="i"),
+    TEXT_TYPE_CODE: lambda node: LeafNode(value=node.text, tag="code"),
+    TEXT_TYPE_LINK: lambda node: LeafNode(
+        value=node.text, tag="a", props={"href": node.url}
+    ),
+    TEXT_TYPE_IMAGE: lambda node: LeafNode(
+        value="", tag="img", props={"src": node.url, "alt": node.text}
+    ),
+}
+
+
+@functools.lru_cache(maxsize=8192)
 def text_node_to_html_node(text_node: TextNode) -> LeafNode:
     """
     Convert a TextNode object to a LeafNode object for HTML representation.
 
+    Conversions are memoized since the same fragments (list items, headings,
+    inline code, ...) tend to repeat across pages, equal TextNode objects thus
+    share the same LeafNode which must not be mutated.
+
     Args:
         text_node (TextNode): The TextNode object to convert.
 
@@ -24,25 +59,11 @@ def text_node_to_html_node(text_node: TextNode) -> LeafNode:
     Raises:
         ValueError: If the text_node has an invalid text_type.
     """
-    if text_node.text_type == TEXT_TYPE_TEXT:
-        return LeafNode(value=text_node.text)
-    elif text_node.text_type == TEXT_TYPE_BOLD:
-        return LeafNode(value=text_node.text, tag="b")
-    elif text_node.text_type == TEXT_TYPE_ITALIC:
-        return LeafNode(value=text_node.text, tag="i")
-    elif text_node.text_type == TEXT_TYPE_CODE:
-        return LeafNode(value=text_node.text, tag="code")
-    elif text_node.text_type == TEXT_TYPE_LINK:
-        return LeafNode(value=text_node.text, tag="a", props={"href": text_node.url})
-    elif text_node.text_type == TEXT_TYPE_IMAGE:
-        return LeafNode(
-            value="", tag="img", props={"src": text_node.url, "alt": text_node.text}
-        )
-    else:
-        raise ValueError(
-            "Text Node has invalid type:\
-            {}".format(text_node.text_type)
-        )
+    to_html_node = TEXT_TYPE_TO_HTML_NODE.get(text_node.text_type)
+    if to_html_node is None:
+        raise ValueError("Text Node has invalid type:\
+            {}".format(text_node.text_type))
+    return to_html_node(text_node)
 
 
 def split_nodes_delimiter(
@@ -74,65 +95,72 @@ def split_nodes_delimiter(
     """
     delimited_nodes = list()
 
-    def extract_parts(text: str) -> list:
-        nonlocal delimiter
+    def extract_parts(text: str) -> List[Tuple[bool, str]]:
+        # each part is tagged with whether it is delimited, with its
+        # delimiters already stripped
         parts = list()
-
-        current_part = ""
-        delim_found = False
         delimiter_length = len(delimiter)
 
-        for char in text:
-            current_part += char
-            if current_part.endswith(delimiter):
-                if delim_found:
-                    if not current_part[delimiter_length:-delimiter_length]:
-                        continue
-                    if current_part.count(delimiter) % 2 != 0:
-                        raise NotImplementedError()
-
-                    # delimited word finished
-                    parts.append(current_part)
-                    current_part = ""
-                    delim_found = False
-                    continue
-                else:
-                    # non-delimited word finished
-                    if current_part[:-delimiter_length]:
-                        parts.append(current_part[:-delimiter_length])
-                    current_part = delimiter  # starting new delimited part
-                    delim_found = True
-                    continue
-
-        # pending part after all delimited words
-        if current_part:
-            parts.append(current_part)
-
-        return parts
+        pos = 0
+        while True:
+            # non-delimited word up to the next delimiter
+            start = text.find(delimiter, pos)
+            if start == -1:
+                # pending part after all delimited words
+                if pos < len(text):
+                    parts.append((False, text[pos:]))
+                return parts
+            if start > pos:
+                parts.append((False, text[pos:start]))
+
+            # delimited word, which can't be closed by a delimiter overlapping
+            # the opening one nor before holding at least one character
+            end = text.find(delimiter, start + delimiter_length + 1)
+            if end == -1:
+                parts.append((True, text[start + delimiter_length : -delimiter_length]))
+                return parts
+            end += delimiter_length
+            # the only other delimiter the word can hold directly follows the
+            # opening one, which makes the delimiter count of the word odd
+            # when it fits before the closing one
+            if text.startswith(
+                delimiter, start + delimiter_length, end - delimiter_length
+            ):
+                raise NotImplementedError()
+            parts.append(
+                (True, text[start + delimiter_length : end - delimiter_length])
+            )
+            pos = end
 
     for node in old_nodes:
-        if not isinstance(node, TextNode) or delimiter not in node.text:
+        if not isinstance(node, TextNode):
             delimited_nodes.append(node)
             continue
-        if node.text.count(delimiter) % 2 != 0:
-            raise ValueError("Invalid markdown syntax")
-
-        # extract parts based on delimiter
-        parts = extract_parts(node.text)
 
-        # not parts[0].startswith(delimiter) is needed when the node text only
-        # has a delimited word
-        if parts[0] == node.text and not parts[0].startswith(delimiter):
+        # a single split both finds the delimiters and counts them
+        pieces = node.text.split(delimiter)
+        if len(pieces) == 1:
             delimited_nodes.append(node)
             continue
-        else:
-            for part in parts:
-                if part.startswith(delimiter):
-                    delimited_nodes.append(
-                        TextNode(part[len(delimiter) : -len(delimiter)], text_type)
-                    )
-                else:
-                    delimited_nodes.append(TextNode(part, TEXT_TYPE_TEXT))
+        if len(pieces) % 2 == 0:
+            raise ValueError("Invalid markdown syntax")
+
+        # with balanced delimiters, the pieces between them alternate between
+        # plain and delimited text, which only holds as long as no delimited
+        # piece is empty, adjacent delimiters are left to extract_parts
+        if all(pieces[1::2]):
+            for ix, piece in enumerate(pieces):
+                if ix % 2:
+                    delimited_nodes.append(TextNode(piece, text_type))
+                elif piece:
+                    delimited_nodes.append(TextNode(piece, TEXT_TYPE_TEXT))
+            continue
+
+        # extract parts based on delimiter
+        for is_delimited, part in extract_parts(node.text):
+            delimited_nodes.append(
+                TextNode(part, text_type if is_delimited else TEXT_TYPE_TEXT)
+            )
 
     return delimited_nodes
 
@@ -164,53 +192,42 @@ def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
     """
     resultant_nodes = list()
     for node in old_nodes:
-        if not isinstance(node, TextNode):
-            resultant_nodes.append(node)
-        elif node.text_type != TEXT_TYPE_TEXT:
+        if not isinstance(node, TextNode) or node.text_type != TEXT_TYPE_TEXT:
             resultant_nodes.append(node)
         else:
-            current_text = node.text
-            while True:
-                if current_text and "!" not in current_text:
-                    resultant_nodes.append(
-                        TextNode(text=current_text, text_type=TEXT_TYPE_TEXT)
-                    )
-                    break
-
-                # broken images, or, text with exclamation mark
-                # so if no images found, assume the text as TEXT_TYPE_TEXT
-                # and append to resultant_nodes
-                images = mf.extract_markdown_images(text=current_text)
-                if not images:
-                    resultant_nodes.append(
-                        TextNode(text=current_text, text_type=TEXT_TYPE_TEXT)
-                    )
-                    break
-
-                # first image tuple
-                image_tuple = mf.extract_markdown_images(text=current_text)[0]
-
-                splits = current_text.split(
-                    f"![{image_tuple[0]}]({image_tuple[1]})", maxsplit=1
+            # broken images, or, text with exclamation mark
+            # so if no images found, assume the text as TEXT_TYPE_TEXT
+            # and append to resultant_nodes
+            images = (
+                mf.extract_markdown_images(text=node.text) if "!" in node.text else []
+            )
+            if not images:
+                resultant_nodes.append(
+                    TextNode(text=node.text, text_type=TEXT_TYPE_TEXT)
                 )
-
-                if splits[0]:
+                continue
+
+            # the images are found in order, so each one is searched for right
+            # after the previous one instead of rescanning the rest of the text
+            text_start = 0
+            for alt_text, url in images:
+                image_start = node.text.find(f"![{alt_text}]({url})", text_start)
+                if image_start > text_start:
                     resultant_nodes.append(
-                        TextNode(text=splits[0], text_type=TEXT_TYPE_TEXT)
+                        TextNode(
+                            text=node.text[text_start:image_start],
+                            text_type=TEXT_TYPE_TEXT,
+                        )
                     )
-
                 resultant_nodes.append(
-                    TextNode(
-                        text=image_tuple[0],
-                        text_type=TEXT_TYPE_IMAGE,
-                        url=image_tuple[1],
-                    )
+                    TextNode(text=alt_text, text_type=TEXT_TYPE_IMAGE, url=url)
                 )
+                text_start = image_start + len(alt_text) + len(url) + 5
 
-                if splits[1]:
-                    current_text = splits[1]
-                    continue
-                break
+            if text_start < len(node.text):
+                resultant_nodes.append(
+                    TextNode(text=node.text[text_start:], text_type=TEXT_TYPE_TEXT)
+                )
 
     return resultant_nodes
 
@@ -245,48 +262,153 @@ def split_nodes_link(old_nodes: List[TextNode]) -> List[TextNode]:
     """
     resultant_nodes = list()
     for node in old_nodes:
-        if not isinstance(node, TextNode):
-            resultant_nodes.append(node)
-        elif node.text_type != TEXT_TYPE_TEXT:
+        if not isinstance(node, TextNode) or node.text_type != TEXT_TYPE_TEXT:
             resultant_nodes.append(node)
         else:
-            current_text = node.text
-            while True:
-                if current_text and "[" not in current_text:
+            if node.text and "[" not in node.text:
+                resultant_nodes.append(
+                    TextNode(text=node.text, text_type=TEXT_TYPE_TEXT)
+                )
+                continue
+
+            # a "[" which doesn't start a link is invalid
+            links = mf.extract_markdown_links(text=node.text)
+            if not links:
+                raise ValueError("Invalid markdown")
+
+            # the links are found in order, so each one is searched for right
+            # after the previous one instead of rescanning the rest of the text
+            text_start = 0
+            for link_text, url in links:
+                link_start = node.text.find(f"[{link_text}]({url})", text_start)
+                if link_start > text_start:
                     resultant_nodes.append(
-                        TextNode(text=current_text, text_type=TEXT_TYPE_TEXT)
+                        TextNode(
+                            text=node.text[text_start:link_start],
+                            text_type=TEXT_TYPE_TEXT,
+                        )
                     )
-                    break
+                resultant_nodes.append(
+                    TextNode(text=link_text, text_type=TEXT_TYPE_LINK, url=url)
+                )
+                text_start = link_start + len(link_text) + len(url) + 4
 
-                # first link tuple
-                try:
-                    link_tuple = mf.extract_markdown_links(text=current_text)[0]
-                except IndexError:
+            if text_start < len(node.text):
+                if "[" in node.text[text_start:]:
                     raise ValueError("Invalid markdown")
-
-                splits = current_text.split(
-                    f"[{link_tuple[0]}]({link_tuple[1]})", maxsplit=1
+                resultant_nodes.append(
+                    TextNode(text=node.text[text_start:], text_type=TEXT_TYPE_TEXT)
                 )
 
-                if splits[0]:
-                    resultant_nodes.append(
-                        TextNode(text=splits[0], text_type=TEXT_TYPE_TEXT)
-                    )
+    return resultant_nodes
 
-                resultant_nodes.append(
-                    TextNode(
-                        text=link_tuple[0],
-                        text_type=TEXT_TYPE_LINK,
-                        url=link_tuple[1],
-                    )
-                )
 
-                if splits[1]:
-                    current_text = splits[1]
-                    continue
-                break
+def find_markdown_reference(text: str, text_start: int) -> Optional[Tuple[int, int]]:
+    """
+    Find the end of the reference text and url of a reference whose text
+    starts at `text_start`, matching the rules of mf.scan_markdown_references.
 
-    return resultant_nodes
+    Args:
+        text (str): The text holding the reference.
+        text_start (int): The index right after the opening "[" or "![".
+
+    Returns:
+        Optional[Tuple[int, int]]: The indices of the "](" separator and the
+        closing ")", or None if no reference starts there.
+    """
+    line_end = text.find("\n", text_start)
+    if line_end == -1:
+        line_end = len(text)
+    separator = text.find("](", text_start, line_end)
+    if separator == -1:
+        return None
+    close = text.find(")", separator + 2, line_end)
+    if close == -1:
+        return None
+    return separator, close
+
+
+def tokenize_text_line(text: str) -> Optional[List[TextNode]]:
+    """
+    Convert Markdown text to a list of TextNode objects in a single left to
+    right scan, instead of a pass over the nodes per kind of markup.
+
+    Only text whose markup is unambiguous is tokenized: references whose text
+    holds no other markup, and delimited texts which are not empty, hold no
+    other markup and are not directly followed by another delimiter. Anything
+    else, including invalid markup, is left to the split functions which
+    define how such text is converted, or rejected.
+
+    Args:
+        text (str): The Markdown text to convert.
+
+    Returns:
+        Optional[List[TextNode]]: A list of TextNode objects representing the
+        Markdown text, or None if the text has to go through the split functions.
+    """
+    if not text:
+        return None
+
+    text_nodes = list()
+    plain_start = 0
+    pos = 0
+    while True:
+        match = INLINE_MARKUP_RE.search(text, pos)
+        if match is None:
+            break
+        start = match.start()
+        char = text[start]
+
+        if char == "!" or char == "[":
+            if char == "!":
+                if not text.startswith("[", start + 1):
+                    pos = start + 1
+                    continue
+                text_start, text_type = start + 2, TEXT_TYPE_IMAGE
+            else:
+                text_start, text_type = start + 1, TEXT_TYPE_LINK
+            reference = find_markdown_reference(text, text_start)
+            if reference is None:
+                return None
+            separator, close = reference
+            ref_text = text[text_start:separator]
+            url = text[separator + 2 : close]
+            # images are split off before links, so no image may start
+            # within the url of a link
+            if (
+                not ref_text
+                or not NESTED_MARKUP_CHARS.isdisjoint(ref_text)
+                or (text_type == TEXT_TYPE_LINK and "![" in url)
+            ):
+                return None
+            end = close + 1
+            token = TextNode(text=ref_text, text_type=text_type, url=url)
+        else:
+            delimiter = "**" if text.startswith("**", start) else char
+            content_start = start + len(delimiter)
+            content_end = text.find(delimiter, content_start)
+            if content_end == -1:
+                return None
+            content = text[content_start:content_end]
+            end = content_end + len(delimiter)
+            if (
+                not content
+                or not NESTED_MARKUP_CHARS.isdisjoint(content)
+                or text[end : end + 1] in ("*", "`")
+            ):
+                return None
+            token = TextNode(text=content, text_type=DELIMITER_TEXT_TYPES[delimiter])
+
+        if plain_start < start:
+            text_nodes.append(
+                TextNode(text=text[plain_start:start], text_type=TEXT_TYPE_TEXT)
+            )
+        text_nodes.append(token)
+        plain_start = pos = end
+
+    if plain_start < len(text):
+        text_nodes.append(TextNode(text=text[plain_start:], text_type=TEXT_TYPE_TEXT))
+    return text_nodes
 
 
 def text_line_to_text_nodes(text: str) -> List[TextNode]:
@@ -302,6 +424,10 @@ def text_line_to_text_nodes(text: str) -> List[TextNode]:
     Raises:
         ValueError: If there is an issue with markdown syntax.
     """
+    text_nodes = tokenize_text_line(text)
+    if text_nodes is not None:
+        return text_nodes
+
     text_nodes = [TextNode(text=text, text_type=TEXT_TYPE_TEXT)]
 
     try:
@@ -314,3 +440,50 @@ def text_line_to_text_nodes(text: str) -> List[TextNode]:
         raise e
 
     return text_nodes
+
+
+def text_lines_to_text_nodes(lines: List[str]) -> List[List[TextNode]]:
+    """
+    Convert several Markdown lines to lists of TextNode objects, running the
+    split pipeline once over all of them instead of once per line.
+
+    Args:
+        lines (List[str]): The Markdown lines to convert.
+
+    Returns:
+        List[List[TextNode]]: A list of TextNode objects for every line.
+
+    Raises:
+        ValueError: If a line is empty or there is an issue with markdown syntax.
+    """
+    if not lines:
+        return list()
+
+    line_nodes = [tokenize_text_line(line) for line in lines]
+    if None not in line_nodes:
+        return line_nodes
+
+    # only the lines left by the tokenizer go through the split pipeline, which
+    # splits every node on its own so the other lines can't change the result
+    split_lines = [ix for ix, nodes in enumerate(line_nodes) if nodes is None]
+    text_nodes = list()
+    for ix in split_lines:
+        if text_nodes:
+            text_nodes.append(LINE_SEPARATOR_NODE)
+        text_nodes.append(TextNode(text=lines[ix], text_type=TEXT_TYPE_TEXT))
+
+    text_nodes = split_nodes_image(text_nodes)
+    text_nodes = split_nodes_link(text_nodes)
+    text_nodes = split_nodes_delimiter(text_nodes, "**", TEXT_TYPE_BOLD)
+    text_nodes = split_nodes_delimiter(text_nodes, "*", TEXT_TYPE_ITALIC)
+    text_nodes = split_nodes_delimiter(text_nodes, "`", TEXT_TYPE_CODE)
+
+    split_line_nodes = [list()]
+    for node in text_nodes:
+        if node is LINE_SEPARATOR_NODE:
+            split_line_nodes.append(list())
+        else:
+            split_line_nodes[-1].append(node)
+    for ix, nodes in zip(split_lines, split_line_nodes):
+        line_nodes[ix] = nodes
+    return line_nodes
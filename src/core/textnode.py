@@ -14,6 +14,8 @@ class TextNode:
         ValueError: If text is not provided or is not a string, or, text_type is not provided or is not a string, or, URL is not a string.
     """
 
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: str, url: Optional[str] = None) -> None:
         if not text:
             raise ValueError("Text must be provided for TextNode")
@@ -51,6 +53,18 @@ class TextNode:
             return True
         return False
 
+    def __hash__(self) -> int:
+        """
+        Return a hash of the TextNode object.
+
+        The hash is consistent with equality, so two equal TextNode objects can
+        be used interchangeably as dictionary keys or cache keys.
+
+        Returns:
+            int: The hash of the text, text_type and URL of the TextNode.
+        """
+        return hash((self.text, self.text_type, self.url))
+
     def __repr__(self) -> str:
         """
         Return a string representation of the TextNode object.
@@ -1,93 +1,372 @@
 import os
 import shutil
 import re
-from glob import glob
-from typing import List, Dict, Callable
-from src.core.markdown_functions import markdown_to_html_node
+import functools
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Callable, Optional, Set, Tuple, Iterable, Iterator
+from src.core.markdown_functions import iter_markdown_html
+from src.core.markdown_cache import md_to_html_cached, prune_cache
+
+TEMPLATE_PLACEHOLDER_RE = re.compile(r"\{\{\s*(Title|Content)\s*\}\}")
+# number of threads copying static files, more than the number of CPUs since
+# they mostly wait on the disk
+COPY_THREADS = min(32, (os.cpu_count() or 1) * 4)
+# whether every copied static file is logged, set PYSSG_VERBOSE=1 to enable
+VERBOSE = os.environ.get("PYSSG_VERBOSE", "0") not in ("", "0")
+# buffer size of generated pages, large enough for most pages to be written
+# out with a single system call even though they are produced block by block
+WRITE_BUFFER_SIZE = 64 * 1024
+# sites with fewer pages are rendered sequentially, starting the worker
+# processes takes longer than rendering a few dozen pages in the calling one
+MIN_PARALLEL_PAGES = 32
+# rendered title and HTML of every page generated in this process, keyed by
+# source path and only reused while the (mtime, size) of the source matches
+RENDERED_PAGES: Dict[str, Tuple[Tuple[int, int], str, str]] = dict()
+# (mtime, size) stamps of the source and of the template every page was last
+# generated from in this process, keyed by page path, incremental builds only
+# generate the pages whose stamps changed since, whichever way the mtime moved
+GENERATED_PAGES: Dict[str, Tuple[Tuple[int, int], Tuple[int, int]]] = dict()
 
 
 def find_files_rec(
     path: str,
-    exclude_dirs: List[str] = [],
-    exclude_files: List[str] = [],
-    filetypes_to_monitor: List[str] = [],
+    exclude_dirs: Optional[List[str]] = None,
+    exclude_files: Optional[List[str]] = None,
+    filetypes_to_monitor: Optional[List[str]] = None,
 ) -> List[str]:
+    suffixes = tuple(f".{ft}" for ft in filetypes_to_monitor or ())
+    exclude_dirs = frozenset(exclude_dirs or ())
+    exclude_files = frozenset(exclude_files or ())
     files = list()
     for dirpath, dirnames, filenames in os.walk(top=path, topdown=True):
         dirnames[:] = [d for d in dirnames if d not in exclude_dirs]
 
-        for ft in filetypes_to_monitor:
-            for file in filenames:
-                file_path = os.path.join(dirpath, file)
-                if (
-                    file_path in glob(os.path.join(dirpath, f"*.{ft}"), recursive=False)
-                    and file not in exclude_files
-                ):
-                    files.append(file_path)
+        for file in filenames:
+            # hidden files are skipped, like a `*.{ft}` glob does
+            if (
+                file.endswith(suffixes)
+                and not file.startswith(".")
+                and file not in exclude_files
+            ):
+                files.append(os.path.join(dirpath, file))
     return files
 
 
-def find_file_timestamps(files: List[str]) -> Dict[str, float]:
-    f_times = dict()
-    for file in files:
-        f_times[file] = os.path.getmtime(file)
-    return f_times
+def find_file_timestamps(files: Iterable[str]) -> Dict[str, float]:
+    # a stat per known file; listing their directories with scandir would
+    # only add syscalls, as DirEntry.stat() makes its own stat call on POSIX.
+    # find_files_and_stamps_rec already takes the timestamps during its walk.
+    return {file: os.stat(file).st_mtime for file in files}
+
+
+def find_files_and_stamps_rec(
+    path: str,
+    exclude_dirs: List[str],
+    exclude_files: List[str],
+    filetypes_to_monitor: List[str],
+) -> Tuple[List[str], Dict[str, float]]:
+    """
+    Find the files to monitor under a directory along with their last modified
+    timestamps in a single walk, using the stat results cached on each
+    directory entry instead of stat'ing every found file a second time.
 
+    Parameters:
+    path (str): The directory to walk.
+    exclude_dirs (List[str]): Directory names which are not descended into.
+    exclude_files (List[str]): File names which are not monitored.
+    filetypes_to_monitor (List[str]): Extensions of the files to monitor.
 
-def copy_static_to_public(static_dir: str, public_dir: str):
+    Returns:
+    Tuple[List[str], Dict[str, float]]: The found files and their timestamps.
+    """
+    suffixes = tuple(f".{ft}" for ft in filetypes_to_monitor)
+    exclude_dirs = frozenset(exclude_dirs)
+    exclude_files = frozenset(exclude_files)
+    files = list()
+    f_times = dict()
+    dirs = [path]
+    while dirs:
+        dirpath = dirs.pop()
+        try:
+            entries = list(os.scandir(dirpath))
+        except OSError:
+            continue
+        subdirs = list()
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # like os.walk, symlinked directories are not followed
+                if entry.name not in exclude_dirs and not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif (
+                entry.name.endswith(suffixes)
+                and not entry.name.startswith(".")
+                and entry.name not in exclude_files
+            ):
+                files.append(entry.path)
+                f_times[entry.path] = entry.stat().st_mtime
+        # walk the subdirectories in listing order
+        dirs.extend(reversed(subdirs))
+    return files, f_times
+
+
+def copy_static_to_public(static_dir: str, public_dir: str) -> Set[str]:
     """
-    Copy the contents of a static directory to a public directory. If the public directory exists, it will be deleted first.
+    Copy the contents of a static directory to a public directory with
+    sync_static. Like rsync, only the files missing from the public directory
+    or older than their source are copied, instead of deleting and copying it
+    all again.
 
     Args:
         static_dir (str): The source directory to copy files from.
         public_dir (str): The destination directory to copy files to.
+
+    Returns:
+        Set[str]: The paths of all the static files within the public directory.
     """
-    # remove public directory if exists
-    if os.path.exists(public_dir):
-        shutil.rmtree(public_dir)
-        print(f"Deleting {public_dir} because it already exists!")
+    return sync_static(static_dir, public_dir)
 
-    # create public directory
-    os.mkdir(public_dir)
-    print(f"Creating {public_dir}")
 
-    copy_files_rec(static_dir, public_dir)
+def copy_file(src: str, dst: str):
+    """
+    Copies the content of a single file.
+
+    shutil.copyfile copies in the kernel where it can, e.g. with sendfile on
+    Linux. Unlike shutil.copy, the permission bits aren't copied, which would
+    cost another stat and chmod per file while the site is only read.
 
+    The copy is only logged when VERBOSE is set, as printing from every copy
+    thread would serialize them on the lock of stdout.
 
-def copy_files_rec(src: str, dst: str):
+    Parameters:
+    src (str): The path to the source file.
+    dst (str): The path to the destination file.
+    """
+    if VERBOSE:
+        print(f"Copying {src} -> {dst}")
+    shutil.copyfile(src=src, dst=dst)
+
+
+def copy_files_rec(
+    src: str,
+    dst: str,
+    concurrency: Optional[int] = None,
+    copy_function: Callable[[str, str], None] = copy_file,
+):
     """
     Recursively copies files and directories from the source directory to the destination directory.
 
+    The tree is walked and its directories are created by shutil.copytree,
+    while the files are handed to a pool of threads, as copying mostly waits
+    on the disk and releases the GIL meanwhile.
+
     Parameters:
     src (str): The path to the source directory.
     dst (str): The path to the destination directory.
+    concurrency (Optional[int]): The maximum number of threads copying files.
+    Defaults to COPY_THREADS.
+    copy_function (Callable[[str, str], None]): The function copying a single
+    file. Defaults to copy_file.
 
     Raises:
     FileNotFoundError: If the source directory does not exist.
     """
-    if not os.path.exists(src):
+    if not os.path.isdir(src):
         raise FileNotFoundError(f"Source directory not found: {src}")
 
-    if not os.path.exists(dst):
-        os.makedirs(dst, exist_ok=True)
+    max_workers = concurrency or COPY_THREADS
+    if max_workers == 1:
+        shutil.copytree(src, dst, copy_function=copy_function, dirs_exist_ok=True)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        copies = list()
+        shutil.copytree(
+            src,
+            dst,
+            copy_function=lambda src_file, dst_file: copies.append(
+                executor.submit(copy_function, src_file, dst_file)
+            ),
+            dirs_exist_ok=True,
+        )
+        # wait for the copies so that copy errors are raised here
+        for copy in copies:
+            copy.result()
+
+
+def file_stamp(path: str) -> Tuple[int, int]:
+    """
+    Returns the last modified timestamp, in nanoseconds, and the size of a
+    file, which tell whether it changed since it was last stamped, even when
+    it was replaced by an older copy.
+
+    Parameters:
+    path (str): The path to the file.
+
+    Returns:
+    Tuple[int, int]: The (mtime, size) stamp of the file.
+
+    Raises:
+    FileNotFoundError: If the file does not exist.
+    """
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
 
-    for file in os.listdir(src):
-        src_file_or_dir = os.path.join(src, file)
-        dst_file_or_dir = os.path.join(dst, file)
-        if os.path.isfile(src_file_or_dir):
-            print(f"Copying {src_file_or_dir} -> {dst_file_or_dir}")
-            shutil.copy(src=src_file_or_dir, dst=dst_file_or_dir)
-        elif os.path.isdir(src_file_or_dir):
-            if not os.path.exists(dst_file_or_dir):
-                os.mkdir(dst_file_or_dir)
-                print(f"Creating {dst_file_or_dir}")
-            copy_files_rec(src_file_or_dir, dst_file_or_dir)
+def sync_static(
+    static_dir: str, public_dir: str, concurrency: Optional[int] = None
+) -> Set[str]:
+    """
+    Copies the static files which are missing from the public directory or
+    whose (mtime, size) stamp differs from their source's, like rsync's quick
+    check, leaving the unchanged files in place. The copies take the mtime of
+    their source so that equal stamps mean an unchanged file, even when the
+    source was replaced by an older copy. The public directory is created when
+    it is missing.
+
+    Parameters:
+    static_dir (str): The source directory to copy files from.
+    public_dir (str): The destination directory to copy files to.
+    concurrency (Optional[int]): The maximum number of threads copying files.
+
+    Returns:
+    Set[str]: The paths of all the static files within the public directory.
+
+    Raises:
+    FileNotFoundError: If the static directory does not exist.
+    """
+    if not os.path.isdir(static_dir):
+        raise FileNotFoundError(f"Source directory not found: {static_dir}")
+    if not os.path.isdir(public_dir):
+        print(f"Creating {public_dir}")
+        os.makedirs(public_dir)
+
+    static_files = set()
+
+    def copy_if_changed(src_file: str, dst_file: str):
+        static_files.add(dst_file)
+        src_stat = os.stat(src_file)
+        try:
+            if file_stamp(dst_file) == (src_stat.st_mtime_ns, src_stat.st_size):
+                return
+        except FileNotFoundError:
+            pass
+        copy_file(src_file, dst_file)
+        os.utime(dst_file, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+    copy_files_rec(static_dir, public_dir, concurrency, copy_if_changed)
+    return static_files
+
+
+def remove_stale_files(public_dir: str, output_files: Set[str]) -> None:
+    """
+    Removes the files of the public directory which are not part of the
+    output of the last build, e.g. pages whose source was deleted, along with
+    the directories left empty by their removal.
+
+    Parameters:
+    public_dir (str): The directory holding the built site.
+    output_files (Set[str]): The paths of the files output by the last build.
+
+    Returns: None
+    """
+    # directories which had a subdirectory removed
+    emptied_dirs = set()
+    # walked bottom-up so that a directory is only looked at once its
+    # subdirectories were cleaned up
+    for dirpath, _, filenames in os.walk(public_dir, topdown=False):
+        removed = dirpath in emptied_dirs
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if path not in output_files:
+                print(f"Deleting {path}")
+                os.remove(path)
+                removed = True
+        # directories which are empty in the build output, e.g. mirroring an
+        # empty content directory, are kept
+        if removed and dirpath != public_dir and not os.listdir(dirpath):
+            print(f"Deleting {dirpath}")
+            os.rmdir(dirpath)
+            emptied_dirs.add(os.path.dirname(dirpath))
+
+
+def read_file(path: str) -> str:
+    """
+    Reads a UTF-8 encoded text file.
+
+    The file is read as bytes with os.read calls sized from its stat, until
+    one returns no data, and decoded in one go, skipping the buffered and text
+    layers of open(). Line endings are normalized to "\\n" like text mode
+    does.
+
+    Parameters:
+    path (str): The path to the file to read.
+
+    Returns:
+    str: The contents of the file.
+
+    Raises:
+    FileNotFoundError: If the file does not exist.
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size + 1
+        # a read may return less than asked before the end of the file, e.g.
+        # on network file systems, and the file may have grown since it was
+        # stat'ed, only an empty read marks the end
+        chunks = list()
+        while chunk := os.read(fd, size):
+            chunks.append(chunk)
+        data = b"".join(chunks)
+    finally:
+        os.close(fd)
+    text = data.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def write_file_chunks(path: str, chunks: Iterable[str]) -> None:
+    """
+    Writes text chunks to a file as UTF-8 encoded bytes as they are produced,
+    replacing any existing content. The chunks are buffered in memory up to
+    WRITE_BUFFER_SIZE bytes before being written to disk.
+
+    The chunks are written to a temporary file next to `path` which then
+    replaces it, so that the file is never seen half written, e.g. by the
+    server while the site is being rebuilt. If producing a chunk fails, the
+    temporary file is removed and `path` is left untouched before the error is
+    raised again.
+
+    Parameters:
+    path (str): The path to the file to write.
+    chunks (Iterable[str]): The pieces of text to write, in order.
+
+    Returns: None
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        try:
+            for chunk in chunks:
+                f.write(chunk.encode("utf-8"))
+        except Exception:
+            f.close()
+            os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, path)
 
 
 def extract_title(text: str) -> str:
     """
     Extracts the title from the first markdown h1 header in the given text.
 
+    Only the lines starting with `# ` are looked at, found with `str.find`,
+    and the scan stops at the first h1 header with a non-empty title.
+
     Parameters:
     text (str): The input text containing markdown content.
 
@@ -97,90 +376,313 @@ def extract_title(text: str) -> str:
     Raises:
     ValueError: If no h1 header is found in the input text.
     """
-    title = re.search(r"^# +(.+)$", text, re.MULTILINE)
-    if not title:
-        raise ValueError("Invalid markdown without any h1 header")
-    return title.group(1)
+    # start of the first candidate line, 0 is only a candidate for the first
+    # line since `find` returns -1 when nothing is found
+    line_start = 0 if text.startswith("# ") else text.find("\n# ") + 1
+    while line_start or text.startswith("# "):
+        line_end = text.find("\n", line_start)
+        if line_end == -1:
+            line_end = len(text)
+        title = text[line_start + 2 : line_end].strip()
+        if title:
+            return title
+        line_start = text.find("\n# ", line_end) + 1
+        if not line_start:
+            break
+    raise ValueError("Invalid markdown without any h1 header")
+
+
+@functools.lru_cache(maxsize=8)
+def compile_template(template: str) -> Tuple[str, ...]:
+    """
+    Splits a template around its `{{ Title }}` and `{{ Content }}` placeholders.
+
+    The result alternates between literal template segments (even indices) and
+    placeholder names (odd indices). It is cached as the template stays the
+    same for every page of a build.
+
+    Parameters:
+    template (str): The contents of the HTML template.
+
+    Returns:
+    Tuple[str, ...]: The literal segments interleaved with placeholder names.
+    """
+    return tuple(TEMPLATE_PLACEHOLDER_RE.split(template))
+
+
+def render_template(template: str, values: Dict[str, str]) -> str:
+    """
+    Substitutes the placeholders of a template with the given values in a
+    single pass over the compiled template.
+
+    Parameters:
+    template (str): The contents of the HTML template.
+    values (Dict[str, str]): The value for each placeholder name, e.g. "Title".
+
+    Returns:
+    str: The rendered template.
+    """
+    return "".join(
+        iter_template(template, {name: [value] for name, value in values.items()})
+    )
+
+
+def iter_template(template: str, values: Dict[str, Iterable[str]]) -> Iterator[str]:
+    """
+    Yields the literal segments of a compiled template with the chunks of each
+    placeholder value in between, so a page can be written out as it is built.
 
+    Parameters:
+    template (str): The contents of the HTML template.
+    values (Dict[str, Iterable[str]]): The chunks for each placeholder name,
+                                       e.g. "Content".
 
-def generate_page(src_path: str, template_path: str, dest_path: str) -> None:
+    Returns:
+    Iterator[str]: The rendered template, chunk by chunk.
+    """
+    parts = compile_template(template)
+    names = parts[1::2]
+    # a placeholder used more than once can't be read from a one-shot iterator
+    values = {
+        name: list(chunks) if names.count(name) > 1 else chunks
+        for name, chunks in values.items()
+    }
+    for ix, part in enumerate(parts):
+        if ix % 2:
+            yield from values[part]
+        else:
+            yield part
+
+
+def generate_page(
+    src_path: str,
+    template: str,
+    dest_path: str,
+    cache_dir: Optional[str] = None,
+) -> None:
     """
-    Generates an HTML page from a markdown source file using a template.
+    Generates an HTML page from a markdown source file using an already loaded
+    template.
 
     Parameters:
     src_path (str): The path to the markdown source file.
-    template_path (str): The path to the HTML template file.
+    template (str): The contents of the HTML template.
     dest_path (str): The path to save the generated HTML file.
+    cache_dir (Optional[str]): The directory used to cache rendered markdown.
+                               If None, the markdown is always rendered.
 
     Returns: None
 
     Raises:
-    FileNotFoundError: If the markdown source file or template file does not exist.
+    FileNotFoundError: If the markdown source file does not exist.
     ValueError: If the markdown source file does not contain a valid h1 header.
     """
-    if not os.path.isfile(src_path):
+    # read markdown source
+    try:
+        if cache_dir is not None:
+            stat = os.stat(src_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            rendered = RENDERED_PAGES.get(src_path)
+            src = None if rendered and rendered[0] == stamp else read_file(src_path)
+        else:
+            src = read_file(src_path)
+    except FileNotFoundError:
         raise FileNotFoundError(f"Markdown source file not found: {src_path}")
-    if not os.path.isfile(template_path):
-        raise FileNotFoundError(f"Template file not found: {template_path}")
 
-    print(f"Generating page from {src_path} to {dest_path} using {template_path}")
+    print(f"Generating page from {src_path} to {dest_path}")
+
+    if cache_dir is not None:
+        # unchanged sources skip reading, hashing and parsing altogether
+        if src is None:
+            _, title, html = RENDERED_PAGES[src_path]
+        else:
+            title = extract_title(src)
+            html = md_to_html_cached(src, cache_dir)
+            RENDERED_PAGES[src_path] = (stamp, title, html)
+        html_content = [html]
+    else:
+        title = extract_title(src)
+        # rendered block by block while the page is being written
+        html_content = iter_markdown_html(src)
+
+    # the destination directory is only created when it is missing, which is
+    # never the case for generate_page_recursive as it creates them all upfront
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir and not os.path.isdir(dest_dir):
+        os.makedirs(dest_dir, exist_ok=True)
+
+    page_chunks = iter_template(template, {"Title": [title], "Content": html_content})
+    write_file_chunks(dest_path, page_chunks)
+
+
+def generate_page_from_paths(
+    src_path: str,
+    template_path: str,
+    dest_path: str,
+    cache_dir: Optional[str] = None,
+) -> None:
+    """
+    Generates an HTML page from a markdown source file using a template file.
 
-    # read markdown source
-    with open(src_path, "r") as f:
-        src = f.read()
+    Parameters:
+    src_path (str): The path to the markdown source file.
+    template_path (str): The path to the HTML template file.
+    dest_path (str): The path to save the generated HTML file.
+    cache_dir (Optional[str]): The directory used to cache rendered markdown.
 
+    Returns: None
+
+    Raises:
+    FileNotFoundError: If the markdown source file or template file does not exist.
+    ValueError: If the markdown source file does not contain a valid h1 header.
+    """
     # read template file
-    with open(template_path, "r") as f:
-        templ = f.read()
+    try:
+        template = read_file(template_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Template file not found: {template_path}")
 
-    html_content = markdown_to_html_node(src).to_html()
-    title = extract_title(src)
+    generate_page(src_path, template, dest_path, cache_dir)
 
-    templ = templ.replace("{{ Title }}", title)
-    templ = templ.replace("{{ Content }}", html_content)
 
-    if not os.path.exists(os.path.dirname(dest_path)):
-        os.makedirs(os.path.dirname(dest_path))
+def find_pages_rec(
+    content_dir: str, dest_path: str
+) -> Tuple[List[Tuple[str, str]], Set[str]]:
+    """
+    Walks the content directory and maps every markdown source file to the
+    HTML file it should be generated into.
+
+    The tree is walked with os.scandir and an explicit stack of directories,
+    whose entries tell files and directories apart without another stat.
+
+    Parameters:
+    content_dir (str): The path to the directory containing markdown source files.
+    dest_path (str): The path to save the generated HTML files.
 
-    with open(dest_path, "w") as f:
-        f.write(templ)
+    Returns:
+    Tuple[List[Tuple[str, str]], Set[str]]: A tuple containing the list of
+    (source, destination) path pairs and the set of destination directories
+    which need to exist before the pages are written.
+    """
+    pages = list()
+    dest_dirs = {dest_path}
+    # (content directory, destination directory) pairs left to walk
+    dirs = [(content_dir, dest_path)]
+    while dirs:
+        src_dir, dest_dir = dirs.pop()
+        subdirs = list()
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    page_name = os.path.splitext(entry.name)[0] + ".html"
+                    pages.append((entry.path, os.path.join(dest_dir, page_name)))
+                elif entry.is_dir():
+                    sub_dest_dir = os.path.join(dest_dir, entry.name)
+                    dest_dirs.add(sub_dest_dir)
+                    subdirs.append((entry.path, sub_dest_dir))
+        # walk the subdirectories in listing order
+        dirs.extend(reversed(subdirs))
+    return pages, dest_dirs
 
 
 def generate_page_recursive(
-    content_dir: str, template_path: str, dest_path: str
-) -> None:
+    content_dir: str,
+    template_path: str,
+    dest_path: str,
+    cache_dir: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    incremental: bool = False,
+) -> List[str]:
     """
     Recursively generates HTML pages from markdown source files in a directory
     using a template.
 
+    The content tree is walked first to collect every page, after which the
+    pages are rendered in parallel using a pool of worker processes since each
+    page only depends on its own source file and the template. Sites with less
+    than MIN_PARALLEL_PAGES pages are rendered sequentially.
+
+    Incremental builds skip the pages whose source file and template have the
+    same (mtime, size) stamps as when the page was last generated.
+
     Parameters:
     content_dir (str): The path to the directory containing markdown source files.
     template_path (str): The path to the HTML template file.
     dest_path (str): The path to save the generated HTML files.
+    cache_dir (Optional[str]): The directory used to cache rendered markdown.
+    concurrency (Optional[int]): The maximum number of worker processes used to
+                                 render pages. Defaults to the number of CPUs,
+                                 and 1 renders the pages sequentially.
+    incremental (bool): Whether pages which are up to date are skipped.
 
-    Returns: None
+    Returns:
+    List[str]: The paths of all the pages, generated or up to date.
 
     Raises:
     FileNotFoundError: If the content directory or template file does not exist.
     """
     if not os.path.isdir(content_dir):
         raise FileNotFoundError(f"Content directory not found: {content_dir}")
-    if not os.path.isfile(template_path):
+
+    try:
+        template_stamp = file_stamp(template_path)
+        template = read_file(template_path)
+    except FileNotFoundError:
         raise FileNotFoundError(f"Template file not found: {template_path}")
 
-    for file in os.listdir(content_dir):
-        content_src = os.path.join(content_dir, file)
-        dest_file = os.path.join(dest_path, file)[:-2] + "html"
-        if os.path.isfile(content_src):
-            generate_page(content_src, template_path, dest_file)
-        elif os.path.isdir(content_src):
-            new_dest_path = os.path.join(dest_path, file)
-            os.makedirs(new_dest_path, exist_ok=True)
-            generate_page_recursive(content_src, template_path, new_dest_path)
+    pages, dest_dirs = find_pages_rec(content_dir, dest_path)
+    for dest_dir in dest_dirs:
+        os.makedirs(dest_dir, exist_ok=True)
+    page_files = [dest_file for _, dest_file in pages]
+
+    # the sources are stamped before being read, so that a source edited
+    # meanwhile keeps its previous stamp and is generated again next time
+    stamps = {
+        dest_file: (file_stamp(src_file), template_stamp)
+        for src_file, dest_file in pages
+    }
+    if incremental:
+        pages = [
+            (src_file, dest_file)
+            for src_file, dest_file in pages
+            if GENERATED_PAGES.get(dest_file) != stamps[dest_file]
+            or not os.path.exists(dest_file)
+        ]
+
+    max_workers = concurrency or os.cpu_count() or 1
+    if max_workers == 1 or len(pages) < MIN_PARALLEL_PAGES:
+        for src_file, dest_file in pages:
+            generate_page(src_file, template, dest_file, cache_dir)
+            GENERATED_PAGES[dest_file] = stamps[dest_file]
+        return page_files
+
+    src_files, dest_files = zip(*pages)
+    # pages are sent to the workers in batches, a few per worker like
+    # multiprocessing.Pool.map does, which sends the template once per batch
+    chunksize = max(1, len(pages) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # consume the results so that errors from the workers are raised here,
+        # and only the pages generated before any error are stamped
+        results = executor.map(
+            generate_page,
+            src_files,
+            repeat(template),
+            dest_files,
+            repeat(cache_dir),
+            chunksize=chunksize,
+        )
+        for dest_file, _ in zip(dest_files, results):
+            GENERATED_PAGES[dest_file] = stamps[dest_file]
+    return page_files
 
 
 def build_site(
-    static_dir: str, content_dir: str, template_path: str, dest_path: str
+    static_dir: str,
+    content_dir: str,
+    template_path: str,
+    dest_path: str,
+    cache_dir: Optional[str] = None,
+    concurrency: Optional[int] = None,
 ) -> Callable[[], None]:
     """
     Returns a closure that, when called, copies all static file content from
@@ -192,25 +694,51 @@ def build_site(
     2. Invoke `generate_page_recursive` to generate HTML pages from markdown
        files in `content_dir` using the specified `template_path`.
 
+    Only the static files which changed are copied, and the files whose
+    source was deleted are removed. The first call generates every page, later
+    calls, e.g. on hot reload, only the pages which changed since. The first
+    call also prunes the cached renders which no page uses any more.
+
     Parameters:
     static_dir (str): The path to the directory containing static files such as
                       CSS, images, etc.
     content_dir (str): The path to the directory containing markdown source files.
     template_path (str): The path to the HTML template file.
     dest_path (str): The path to save the generated HTML files.
+    cache_dir (Optional[str]): The directory used to cache rendered markdown
+                               between builds.
+    concurrency (Optional[int]): The maximum number of worker processes used to
+                                 render pages.
 
     Returns:
     Callable[[], None]: A closure that performs the described operations when called.
     """
 
+    is_built = False
+
     def closure():
-        # Copy static files every time the closure is called
-        copy_static_to_public(static_dir=static_dir, public_dir=dest_path)
-        # Generate HTML pages from markdown source files
-        generate_page_recursive(
+        nonlocal is_built
+        # Drop the cached renders no page uses any more, once per run as the
+        # first build renders every page anyway
+        if not is_built and cache_dir is not None:
+            pages, _ = find_pages_rec(content_dir, dest_path)
+            prune_cache(cache_dir, (read_file(src_path) for src_path, _ in pages))
+        # Copy the static files which changed since the last build
+        static_files = copy_static_to_public(
+            static_dir=static_dir, public_dir=dest_path
+        )
+        # Generate HTML pages from markdown source files, all of them on the
+        # first build so that no page output by another version is kept
+        page_files = generate_page_recursive(
             content_dir=content_dir,
             template_path=template_path,
             dest_path=dest_path,
+            cache_dir=cache_dir,
+            concurrency=concurrency,
+            incremental=is_built,
         )
+        # Remove the outputs whose source was deleted
+        remove_stale_files(dest_path, static_files.union(page_files))
+        is_built = True
 
     return closure
@@ -1,6 +1,8 @@
 import os
+import argparse
 from src.core.utils import build_site
 from src.core.server import run
+from src.core.markdown_cache import CACHE_DIR_NAME, clean_cache
 
 # Determine the root path based on "main.py" and other desired paths which will
 # later be used for site-code generation and hot-reloading!
@@ -9,15 +11,31 @@ STATIC_DIR = os.path.join(ROOT_PATH, "src/static")
 PUBLIC_DIR = os.path.join(ROOT_PATH, "public")
 CONTENT_DIR = os.path.join(ROOT_PATH, "content")
 TEMPLATE_PATH = os.path.join(ROOT_PATH, "template.html")
+CACHE_DIR = os.path.join(ROOT_PATH, CACHE_DIR_NAME)
+# Number of worker processes used to generate pages in parallel
+CONCURRENCY = os.cpu_count()
 
 build_site_handler = build_site(
     static_dir=STATIC_DIR,
     content_dir=CONTENT_DIR,
     template_path=TEMPLATE_PATH,
     dest_path=PUBLIC_DIR,
+    cache_dir=CACHE_DIR,
+    concurrency=CONCURRENCY,
 )
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and serve the static site")
+    parser.add_argument(
+        "--clean-cache",
+        action="store_true",
+        help="remove the cached markdown renders before building",
+    )
+    args = parser.parse_args()
+
+    if args.clean_cache:
+        clean_cache(CACHE_DIR)
+
     run(
         root_path=ROOT_PATH,
         public_dir=PUBLIC_DIR,
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.core.markdown_cache import (
+    CACHE_VERSION,
+    md_to_html_cached,
+    clean_cache,
+    prune_cache,
+)
+
+
+class TestMdToHtmlCached(unittest.TestCase):
+    def setUp(self):
+        md_to_html_cached.cache_clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, ".pyssg-cache")
+
+    def tearDown(self):
+        md_to_html_cached.cache_clear()
+        self.tmp_dir.cleanup()
+
+    def test_cache_miss_renders_and_stores(self):
+        html = md_to_html_cached("# Title", self.cache_dir)
+
+        self.assertEqual(html, "<div><h1>Title</h1></div>")
+        self.assertEqual(os.listdir(self.cache_dir), [CACHE_VERSION])
+        version_dir = os.path.join(self.cache_dir, CACHE_VERSION)
+        cached_files = os.listdir(version_dir)
+        self.assertEqual(len(cached_files), 1)
+        self.assertTrue(cached_files[0].endswith(".html"))
+        with open(os.path.join(version_dir, cached_files[0]), "r") as f:
+            self.assertEqual(f.read(), html)
+
+    def test_cache_hit_from_disk_skips_rendering(self):
+        md_to_html_cached("# Title", self.cache_dir)
+        md_to_html_cached.cache_clear()
+
+        with patch("src.core.markdown_cache.markdown_to_html_string") as mock_render:
+            html = md_to_html_cached("# Title", self.cache_dir)
+
+        mock_render.assert_not_called()
+        self.assertEqual(html, "<div><h1>Title</h1></div>")
+
+    def test_cache_hit_in_memory_skips_disk(self):
+        md_to_html_cached("# Title", self.cache_dir)
+
+        with patch("src.core.markdown_cache.os.path.isfile") as mock_isfile:
+            md_to_html_cached("# Title", self.cache_dir)
+
+        mock_isfile.assert_not_called()
+
+    def test_different_bodies_use_different_entries(self):
+        md_to_html_cached("# Title", self.cache_dir)
+        md_to_html_cached("# Another Title", self.cache_dir)
+
+        version_dir = os.path.join(self.cache_dir, CACHE_VERSION)
+        self.assertEqual(len(os.listdir(version_dir)), 2)
+
+    def test_other_renderer_version_is_not_served(self):
+        md_to_html_cached("# Title", self.cache_dir)
+        md_to_html_cached.cache_clear()
+
+        with patch("src.core.markdown_cache.CACHE_VERSION", "older"):
+            with patch(
+                "src.core.markdown_cache.markdown_to_html_string",
+                return_value="<div>older</div>",
+            ) as mock_render:
+                md_to_html_cached("# Title", self.cache_dir)
+
+        mock_render.assert_called_once_with("# Title")
+        self.assertEqual(
+            sorted(os.listdir(self.cache_dir)), sorted([CACHE_VERSION, "older"])
+        )
+
+    def test_invalid_markdown_is_not_cached(self):
+        with self.assertRaises(ValueError):
+            md_to_html_cached("", self.cache_dir)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+
+class TestPruneCache(unittest.TestCase):
+    def setUp(self):
+        md_to_html_cached.cache_clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, ".pyssg-cache")
+
+    def tearDown(self):
+        md_to_html_cached.cache_clear()
+        self.tmp_dir.cleanup()
+
+    def test_prune_keeps_only_used_entries(self):
+        md_to_html_cached("# Title", self.cache_dir)
+        md_to_html_cached("# Edited Title", self.cache_dir)
+        version_dir = os.path.join(self.cache_dir, CACHE_VERSION)
+        kept_files = set(os.listdir(version_dir))
+        md_to_html_cached("# Old Title", self.cache_dir)
+        open(os.path.join(version_dir, "entry.html.123.tmp"), "w").close()
+        os.makedirs(os.path.join(self.cache_dir, "older"))
+        open(os.path.join(self.cache_dir, "0123456789abcdef.html"), "w").close()
+
+        prune_cache(self.cache_dir, ["# Title", "# Edited Title"])
+
+        self.assertEqual(os.listdir(self.cache_dir), [CACHE_VERSION])
+        self.assertEqual(set(os.listdir(version_dir)), kept_files)
+
+    def test_prune_missing_directory(self):
+        prune_cache(self.cache_dir, ["# Title"])
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+
+class TestCleanCache(unittest.TestCase):
+    def setUp(self):
+        md_to_html_cached.cache_clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, ".pyssg-cache")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @patch("builtins.print")
+    def test_clean_cache_removes_directory(self, mock_print):
+        md_to_html_cached("# Title", self.cache_dir)
+
+        clean_cache(self.cache_dir)
+
+        self.assertFalse(os.path.exists(self.cache_dir))
+        self.assertEqual(md_to_html_cached.cache_info().currsize, 0)
+
+    def test_clean_cache_missing_directory(self):
+        clean_cache(self.cache_dir)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 
 import src.core.markdown_functions as mf
 import src.core.text_functions as tf
@@ -35,6 +36,16 @@ class TestExtractMarkdownImages(unittest.TestCase):
         expected = []
         self.assertEqual(mf.extract_markdown_images(text), expected)
 
+    def test_image_does_not_span_lines(self):
+        text = "![alt\ntext](http://example.com/image.jpg) ![next](url\n)"
+        expected = []
+        self.assertEqual(mf.extract_markdown_images(text), expected)
+
+    def test_image_alt_ends_at_first_closing_bracket(self):
+        text = "![a] b](url) c)"
+        expected = [("a] b", "url")]
+        self.assertEqual(mf.extract_markdown_images(text), expected)
+
 
 class TestExtractMarkdownLinks(unittest.TestCase):
     def test_only_link(self):
@@ -60,70 +71,25 @@ class TestExtractMarkdownLinks(unittest.TestCase):
         expected = []
         self.assertEqual(mf.extract_markdown_links(text), expected)
 
+    def test_images_are_not_links(self):
+        text = "An ![image](http://example.com/a.png) and a [link](http://example.com)."
+        expected = [("link", "http://example.com")]
+        self.assertEqual(mf.extract_markdown_links(text), expected)
+
     def test_broken_links(self):
         text = "Broken [link(http://example.com)."
         expected = []
         self.assertEqual(mf.extract_markdown_links(text), expected)
 
+    def test_link_on_a_later_line(self):
+        text = "[broken](\n[link](http://example.com)"
+        expected = [("link", "http://example.com")]
+        self.assertEqual(mf.extract_markdown_links(text), expected)
 
-class TestGetCodeblockIndices(unittest.TestCase):
-    def test_single_codeblock(self):
-        text = "```\ncode block\n```"
-        expected = [(0, 18)]
-        self.assertEqual(mf.get_codeblock_indices(text), expected)
-
-    def test_multiple_codeblocks(self):
-        text = "```\ncode block 1\n```\n\n```\ncode block 2\n```"
-        expected = [(0, 20), (22, 42)]
-        self.assertEqual(mf.get_codeblock_indices(text), expected)
-
-    def test_no_codeblocks(self):
-        text = "This is a paragraph."
-        expected = []
-        self.assertEqual(mf.get_codeblock_indices(text), expected)
-
-    def test_incomplete_codeblock(self):
-        text = "```\ncode block"
-        expected = []
-        self.assertEqual(mf.get_codeblock_indices(text), expected)
-
-
-class TestGetNonCodeblocks(unittest.TestCase):
-    def test_single_paragraph(self):
-        text = "This is a paragraph."
-        expected = ["This is a paragraph."]
-        self.assertEqual(mf.get_non_codeblocks(text), expected)
-
-    def test_multiple_paragraphs(self):
-        text = "This is a paragraph.\n\nThis is another paragraph."
-        expected = ["This is a paragraph.", "This is another paragraph."]
-        self.assertEqual(mf.get_non_codeblocks(text), expected)
-
-    def test_mixed_content(self):
-        text = """\
-This is a paragraph.
-
-> This is a quote.
-
-* This is a list item
-* Another list item\
-        """
-        expected = [
-            "This is a paragraph.",
-            "> This is a quote.",
-            "* This is a list item\n* Another list item",
-        ]
-        self.assertEqual(mf.get_non_codeblocks(text), expected)
-
-    def test_codeblock_in_text(self):
-        text = "Paragraph before\n```\ncode block\n```\nParagraph after"
-        expected = ["Paragraph before\n```\ncode block\n```\nParagraph after"]
-        self.assertEqual(mf.get_non_codeblocks(text), expected)
-
-    def test_empty_input(self):
-        text = ""
+    def test_many_unclosed_brackets(self):
+        text = "[" * 20000 + "](url"
         expected = []
-        self.assertEqual(mf.get_non_codeblocks(text), expected)
+        self.assertEqual(mf.extract_markdown_links(text), expected)
 
 
 class TestConvertMarkdownToBlock(unittest.TestCase):
@@ -149,6 +115,11 @@ class TestConvertMarkdownToBlock(unittest.TestCase):
         expected = ["* Item 1\n* Item 2"]
         self.assertEqual(mf.markdown_to_blocks(text), expected)
 
+    def test_whitespace_only_lines_separate_blocks(self):
+        text = "  First line  \n\tsecond line\n \t \n\n\n  Next block\n   "
+        expected = ["First line\nsecond line", "Next block"]
+        self.assertEqual(mf.markdown_to_blocks(text), expected)
+
     def test_empty_input(self):
         text = ""
         expected = []
@@ -169,6 +140,31 @@ class TestConvertMarkdownToBlock(unittest.TestCase):
         expected = ["Paragraph before", "```\ncode block\n```", "Paragraph after"]
         self.assertEqual(mf.markdown_to_blocks(text), expected)
 
+    def test_multiple_codeblocks(self):
+        text = "```\ncode block 1\n```\n\n```\ncode block 2\n```"
+        expected = ["```\ncode block 1\n```", "```\ncode block 2\n```"]
+        self.assertEqual(mf.markdown_to_blocks(text), expected)
+
+    def test_codeblock_keeps_blank_lines_and_indentation(self):
+        text = "```\ndef f():\n\n    return 1\n```"
+        expected = ["```\ndef f():\n\n    return 1\n```"]
+        self.assertEqual(mf.markdown_to_blocks(text), expected)
+
+    def test_incomplete_codeblock(self):
+        text = "Paragraph before\n```\n  code block\n\nParagraph after"
+        expected = ["Paragraph before\n```\ncode block", "Paragraph after"]
+        self.assertEqual(mf.markdown_to_blocks(text), expected)
+
+    def test_codeblock_followed_by_text_on_closing_line(self):
+        text = "```\ncode block\n``` text after\nmore text"
+        expected = ["```\ncode block\n```", "text after\nmore text"]
+        self.assertEqual(mf.markdown_to_blocks(text), expected)
+
+    def test_iter_markdown_blocks_is_lazy(self):
+        blocks = mf.iter_markdown_blocks("first\n\nsecond")
+        self.assertEqual(next(blocks), "first")
+        self.assertEqual(list(blocks), ["second"])
+
     def test_quote_block(self):
         text = "> This is a quote"
         expected = ["> This is a quote"]
@@ -310,6 +306,72 @@ class TestBlockToBlockType(unittest.TestCase):
         )
 
 
+class TestHeadingLevel(unittest.TestCase):
+    def test_counts_leading_hashes_only(self):
+        self.assertEqual(mf.heading_level("## Foo # Bar"), 2)
+
+    def test_no_hashes(self):
+        self.assertEqual(mf.heading_level("Paragraph #1"), 0)
+        self.assertEqual(mf.heading_level(""), 0)
+
+    def test_caps_at_seven(self):
+        self.assertEqual(mf.heading_level("#" * 20 + " Title"), 7)
+
+
+class TestClassifyMarkdownBlock(unittest.TestCase):
+    def test_unordered_list_items_are_stripped(self):
+        self.assertEqual(
+            mf.classify_markdown_block("* item 1\n- item 2"),
+            (mf.BLOCK_TYPE_UNORD_LIST, ["item 1", "item 2"]),
+        )
+
+    def test_ordered_list_items_are_stripped(self):
+        self.assertEqual(
+            mf.classify_markdown_block("1. item 1\n2. item 2\n3. item 3"),
+            (mf.BLOCK_TYPE_ORD_LIST, ["item 1", "item 2", "item 3"]),
+        )
+
+    def test_ordered_list_multi_digit_numbers(self):
+        block = "\n".join(f"{i}. item {i}" for i in range(1, 12))
+        self.assertEqual(
+            mf.classify_markdown_block(block),
+            (mf.BLOCK_TYPE_ORD_LIST, [f"item {i}" for i in range(1, 12)]),
+        )
+
+    def test_ordered_list_without_space(self):
+        self.assertEqual(
+            mf.classify_markdown_block("1.item"),
+            (mf.BLOCK_TYPE_PARAGRAPH, ["1.item"]),
+        )
+
+    def test_other_blocks_are_unchanged(self):
+        for block, block_type in [
+            ("## Heading", mf.BLOCK_TYPE_HEADING),
+            ("```\ncode\n```", mf.BLOCK_TYPE_CODE),
+            ("> quote\n> more", mf.BLOCK_TYPE_QUOTE),
+            ("- not\na list", mf.BLOCK_TYPE_PARAGRAPH),
+            ("#hashtag", mf.BLOCK_TYPE_PARAGRAPH),
+            ("", mf.BLOCK_TYPE_PARAGRAPH),
+        ]:
+            self.assertEqual(mf.classify_markdown_block(block), (block_type, [block]))
+
+
+class TestMarkdownListItemsToTextNode(unittest.TestCase):
+    def test_list_items(self):
+        expected_nodes = [
+            [TextNode("item1", tf.TEXT_TYPE_BOLD)],
+            [TextNode("item2", tf.TEXT_TYPE_TEXT)],
+        ]
+        self.assertEqual(
+            mf.markdown_list_items_to_text_node(items=["**item1**", "item2"]),
+            expected_nodes,
+        )
+
+    def test_list_items_empty(self):
+        with self.assertRaises(NotImplementedError):
+            mf.markdown_list_items_to_text_node(items=["item1", ""])
+
+
 class TestMarkdownToTextNode(unittest.TestCase):
     def test_paragraph_single_line(self):
         text = "This is **bolded** paragraph"
@@ -361,6 +423,11 @@ This is the same paragraph on a new line\
         ]
         self.assertEqual(mf.markdown_heading_to_text_node(text=text), expected_nodes)
 
+    def test_heading_keeps_inner_hashes(self):
+        text = "# C# Tips"
+        expected_nodes = [TextNode("C# Tips", tf.TEXT_TYPE_TEXT)]
+        self.assertEqual(mf.markdown_heading_to_text_node(text=text), expected_nodes)
+
     def test_heading_invalid_heading(self):
         text = "####### heading7 doesn't exist"
         expected_nodes = [TextNode("####### heading7 doesn't exist", tf.TEXT_TYPE_TEXT)]
@@ -389,6 +456,11 @@ This is the same paragraph on a new line\
         ]
         self.assertEqual(mf.markdown_quote_to_text_node(text=text), expected_nodes)
 
+    def test_quote_bare_marker_line(self):
+        text = "> first\n>\n> second"
+        expected_nodes = [TextNode("first\nsecond", tf.TEXT_TYPE_TEXT)]
+        self.assertEqual(mf.markdown_quote_to_text_node(text=text), expected_nodes)
+
     def test_quote_nested_quote(self):
         text = "> This quote itself has a > inside it"
         expected_nodes = [
@@ -421,6 +493,14 @@ This is the same paragraph on a new line\
         ]
         self.assertEqual(mf.markdown_unord_list_to_text_node(text=text), expected_nodes)
 
+    def test_unord_list_mixed_delimiters(self):
+        text = "* item1\n- item2"
+        expected_nodes = [
+            [TextNode("item1", tf.TEXT_TYPE_TEXT)],
+            [TextNode("item2", tf.TEXT_TYPE_TEXT)],
+        ]
+        self.assertEqual(mf.markdown_unord_list_to_text_node(text=text), expected_nodes)
+
     def test_unord_list_empty(self):
         text = "* "
         with self.assertRaises(NotImplementedError):
@@ -446,6 +526,14 @@ This is the same paragraph on a new line\
         ]
         self.assertEqual(mf.markdown_ord_list_to_text_node(text=text), expected_nodes)
 
+    def test_ord_list_multi_digit_numbers(self):
+        text = "9. item9\n10. item10"
+        expected_nodes = [
+            [TextNode("item9", tf.TEXT_TYPE_TEXT)],
+            [TextNode("item10", tf.TEXT_TYPE_TEXT)],
+        ]
+        self.assertEqual(mf.markdown_ord_list_to_text_node(text=text), expected_nodes)
+
     def test_ord_list_empty(self):
         text = "1. "
         with self.assertRaises(NotImplementedError):
@@ -684,5 +772,127 @@ This is a paragraph with `code`.
         self.assertEqual(mf.markdown_to_html_node(text=text).to_html(), expected)
 
 
+class TestMarkdownToHtmlString(unittest.TestCase):
+    def test_matches_html_node_output(self):
+        text = """\
+# Heading 1
+
+This is a paragraph with `code` and a [link](https://example.com).
+
+```
+code block
+```
+
+> A blockquote with **bold** text.
+
+* Unordered list item 1
+- Unordered list item 2
+
+1. Ordered list item 1
+2. Ordered list *item* 2\
+"""
+        self.assertEqual(
+            mf.markdown_to_html_string(text=text),
+            mf.markdown_to_html_node(text=text).to_html(),
+        )
+
+    def test_heading(self):
+        self.assertEqual(
+            mf.markdown_to_html_string(text="## My `awesome` heading"),
+            "<div><h2>My <code>awesome</code> heading</h2></div>",
+        )
+
+    def test_code_block(self):
+        self.assertEqual(
+            mf.markdown_to_html_string(text="```\nprint('hi')\n```"),
+            "<div><pre>\nprint('hi')\n</pre></div>",
+        )
+
+    def test_iter_markdown_html_matches_string_output(self):
+        text = "# Heading\n\nParagraph with **bold**\n\n* item1\n* item2"
+        self.assertEqual(
+            list(mf.iter_markdown_html(text=text)),
+            [
+                "<div>",
+                "<h1>Heading</h1>",
+                "<p>Paragraph with <b>bold</b></p>",
+                "<ul><li>item1</li><li>item2</li></ul>",
+                "</div>",
+            ],
+        )
+        self.assertEqual(
+            "".join(mf.iter_markdown_html(text=text)),
+            mf.markdown_to_html_string(text=text),
+        )
+
+    def test_iter_markdown_html_blank_input(self):
+        with self.assertRaises(ValueError):
+            next(mf.iter_markdown_html(text="\n\n"))
+
+    def test_parallel_rendering_sends_repeated_blocks_once(self):
+        text = "\n\n".join(f"Paragraph {i % 3}" for i in range(9))
+        expected = mf.markdown_to_html_string(text=text)
+
+        with patch.object(mf, "PARALLEL_BLOCKS_THRESHOLD", 2), patch(
+            "src.core.markdown_functions.os.cpu_count", return_value=2
+        ), patch("src.core.markdown_functions.ProcessPoolExecutor") as mock_executor:
+            mock_map = mock_executor.return_value.__enter__.return_value.map
+            mock_map.side_effect = lambda fn, blocks, chunksize: map(fn, blocks)
+            self.assertEqual(mf.markdown_to_html_string(text=text), expected)
+
+        self.assertEqual(
+            mock_map.call_args.args[1], ["Paragraph 0", "Paragraph 1", "Paragraph 2"]
+        )
+
+    def test_heading_level_counts_leading_hashes_only(self):
+        text = "# Foo # Bar"
+        self.assertEqual(
+            mf.markdown_to_html_string(text=text), "<div><h1>Foo # Bar</h1></div>"
+        )
+        self.assertEqual(
+            mf.markdown_to_html_node(text=text).to_html(),
+            "<div><h1>Foo # Bar</h1></div>",
+        )
+
+    def test_repeated_blocks_are_rendered_once(self):
+        mf.render_markdown_block.cache_clear()
+        text = "Footer with a [link](https://example.com)"
+
+        with patch(
+            "src.core.markdown_functions.classify_markdown_block",
+            wraps=mf.classify_markdown_block,
+        ) as mock_classify:
+            first = mf.markdown_to_html_string(text=text)
+            second = mf.markdown_to_html_string(text=text + "\n\n" + text)
+
+        mock_classify.assert_called_once_with(text)
+        paragraph = '<p>Footer with a <a href="https://example.com">link</a></p>'
+        self.assertEqual(first, f"<div>{paragraph}</div>")
+        self.assertEqual(second, f"<div>{paragraph}{paragraph}</div>")
+        mf.render_markdown_block.cache_clear()
+
+    def test_parallel_rendering_preserves_order(self):
+        text = "\n\n".join(f"Paragraph {i} with **bold**" for i in range(10))
+        expected = mf.markdown_to_html_string(text=text)
+
+        with patch.object(mf, "PARALLEL_BLOCKS_THRESHOLD", 2), patch(
+            "src.core.markdown_functions.os.cpu_count", return_value=2
+        ), patch("src.core.markdown_functions.ProcessPoolExecutor") as mock_executor:
+            mock_executor.return_value.__enter__.return_value.map.side_effect = (
+                lambda fn, blocks, chunksize: map(fn, blocks)
+            )
+            self.assertEqual(mf.markdown_to_html_string(text=text), expected)
+
+        mock_executor.assert_called_once_with(max_workers=2)
+
+    def test_empty_string(self):
+        with self.assertRaises(ValueError):
+            mf.markdown_to_html_string(text="")
+
+    def test_blank_input(self):
+        with self.assertRaises(ValueError):
+            mf.markdown_to_html_string(text="\n\n")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,10 +1,21 @@
+import os
+import gzip
+import tempfile
+import threading
 import unittest
-from unittest.mock import patch
+import urllib.request
+import http.client
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch, Mock
 from src.core.server import (
     get_updated_tracked_lists,
     compare_files,
     compare_timestamps,
     is_needed_to_reload,
+    find_dir_timestamps,
+    are_dirs_modified,
+    create_handler,
+    find_html_files,
     EXCLUDE_DIRS,
     EXCLUDE_FILES,
     FILETYPES_TO_MONITOR,
@@ -16,24 +27,21 @@ class TestServerFunctions(unittest.TestCase):
         # Mocking the project root path and public directory
         self.root_path = "/mock/"
 
-    @patch("src.core.server.find_file_timestamps")
-    @patch("src.core.server.find_files_rec")
-    def test_get_updated_tracked_lists(
-        self, mock_find_files_rec, mock_find_file_timestamps
-    ):
-        mock_find_files_rec.return_value = [
-            "/mock/content/file1.md",
-            "/mock/content/subdir/file2.md",
-        ]
-        mock_find_file_timestamps.return_value = {
-            "/mock/content/file1.md": 12345.0,
-            "/mock/content/subdir/file2.md": 67890.0,
-        }
+    @patch("src.core.server.find_files_and_stamps_rec")
+    def test_get_updated_tracked_lists(self, mock_find_files_and_stamps_rec):
+        mock_find_files_and_stamps_rec.return_value = (
+            ["/mock/content/file1.md", "/mock/content/subdir/file2.md"],
+            {
+                "/mock/content/file1.md": 12345.0,
+                "/mock/content/subdir/file2.md": 67890.0,
+            },
+        )
 
         files, filestamps = get_updated_tracked_lists(self.root_path)
 
         self.assertEqual(
-            files, ["/mock/content/file1.md", "/mock/content/subdir/file2.md"]
+            files,
+            frozenset(["/mock/content/file1.md", "/mock/content/subdir/file2.md"]),
         )
         self.assertEqual(
             filestamps,
@@ -42,19 +50,16 @@ class TestServerFunctions(unittest.TestCase):
                 "/mock/content/subdir/file2.md": 67890.0,
             },
         )
-        mock_find_files_rec.assert_called_once_with(
+        mock_find_files_and_stamps_rec.assert_called_once_with(
             path=self.root_path,
             exclude_dirs=EXCLUDE_DIRS,
             exclude_files=EXCLUDE_FILES,
             filetypes_to_monitor=FILETYPES_TO_MONITOR,
         )
-        mock_find_file_timestamps.assert_called_once_with(
-            ["/mock/content/file1.md", "/mock/content/subdir/file2.md"]
-        )
 
     def test_compare_files_no_changes(self):
-        tracked_files = ["/mock/file1.html", "/mock/file2.html"]
-        u_tracked_files = ["/mock/file1.html", "/mock/file2.html"]
+        tracked_files = frozenset(["/mock/file1.html", "/mock/file2.html"])
+        u_tracked_files = frozenset(["/mock/file1.html", "/mock/file2.html"])
 
         added_files, deleted_files = compare_files(
             tracked_files=tracked_files, u_tracked_files=u_tracked_files
@@ -64,8 +69,8 @@ class TestServerFunctions(unittest.TestCase):
         self.assertSetEqual(deleted_files, set())
 
     def test_compare_files_changes(self):
-        tracked_files = ["/mock/file1.html", "/mock/file2.html"]
-        u_tracked_files = ["/mock/file2.html", "/mock/file3.css"]
+        tracked_files = frozenset(["/mock/file1.html", "/mock/file2.html"])
+        u_tracked_files = frozenset(["/mock/file2.html", "/mock/file3.css"])
 
         added_files, deleted_files = compare_files(
             tracked_files=tracked_files, u_tracked_files=u_tracked_files
@@ -96,12 +101,23 @@ class TestServerFunctions(unittest.TestCase):
 
         self.assertSetEqual(modified_files, {"/mock/file1.md"})
 
+    def test_compare_timestamps_added_and_removed_files(self):
+        tracked_filestamps = {"/mock/file1.md": 12345.0, "/mock/file2.html": 67890.0}
+        u_tracked_filestamps = {"/mock/file1.md": 12345.0, "/mock/file3.css": 1.0}
+
+        modified_files = compare_timestamps(
+            tracked_filestamps=tracked_filestamps,
+            u_tracked_filestamps=u_tracked_filestamps,
+        )
+
+        self.assertSetEqual(modified_files, {"/mock/file2.html"})
+
     @patch("src.core.server.get_updated_tracked_lists")
     def test_is_needed_to_reload_no_changes(self, mock_get_updated_tracked_lists):
-        tracked_files = ["/mock/file1.md", "/mock/file2.html"]
+        tracked_files = frozenset(["/mock/file1.md", "/mock/file2.html"])
         tracked_filestamps = {"/mock/file1.md": 12345.0, "/mock/file2.html": 67890.0}
         mock_get_updated_tracked_lists.return_value = (
-            ["/mock/file1.md", "/mock/file2.html"],
+            frozenset(["/mock/file1.md", "/mock/file2.html"]),
             {"/mock/file1.md": 12345.0, "/mock/file2.html": 67890.0},
         )
 
@@ -116,10 +132,10 @@ class TestServerFunctions(unittest.TestCase):
 
     @patch("src.core.server.get_updated_tracked_lists")
     def test_is_needed_to_reload_changes(self, mock_get_updated_tracked_lists):
-        tracked_files = ["/mock/file1.md", "/mock/file2.html"]
+        tracked_files = frozenset(["/mock/file1.md", "/mock/file2.html"])
         tracked_filestamps = {"/mock/file1.md": 12345.0, "/mock/file2.html": 67890.0}
         mock_get_updated_tracked_lists.return_value = (
-            ["/mock/file1.md", "/mock/file2.html"],
+            frozenset(["/mock/file1.md", "/mock/file2.html"]),
             {"/mock/file1.md": 69420.0, "/mock/file2.html": 67890.0},
         )
 
@@ -132,6 +148,233 @@ class TestServerFunctions(unittest.TestCase):
         )
         mock_get_updated_tracked_lists.assert_called_once_with(self.root_path)
 
+    @patch("src.core.server.find_file_timestamps")
+    @patch("src.core.server.are_dirs_modified", return_value=False)
+    @patch("src.core.server.get_updated_tracked_lists")
+    def test_is_needed_to_reload_skips_rescan_when_dirs_unchanged(
+        self,
+        mock_get_updated_tracked_lists,
+        mock_are_dirs_modified,
+        mock_find_file_timestamps,
+    ):
+        tracked_files = frozenset(["/mock/file1.md"])
+        tracked_dirstamps = {"/mock/": 1.0}
+        mock_find_file_timestamps.return_value = {"/mock/file1.md": 12345.0}
+
+        self.assertFalse(
+            is_needed_to_reload(
+                root_path=self.root_path,
+                tracked_files=tracked_files,
+                tracked_filestamps={"/mock/file1.md": 12345.0},
+                tracked_dirstamps=tracked_dirstamps,
+            )
+        )
+        self.assertTrue(
+            is_needed_to_reload(
+                root_path=self.root_path,
+                tracked_files=tracked_files,
+                tracked_filestamps={"/mock/file1.md": 1.0},
+                tracked_dirstamps=tracked_dirstamps,
+            )
+        )
+        mock_find_file_timestamps.assert_called_with(tracked_files)
+        mock_get_updated_tracked_lists.assert_not_called()
+
+    @patch("src.core.server.find_dir_timestamps", return_value={"/mock/": 2.0})
+    @patch("src.core.server.are_dirs_modified", return_value=True)
+    @patch("src.core.server.get_updated_tracked_lists")
+    def test_is_needed_to_reload_refreshes_dirstamps(
+        self,
+        mock_get_updated_tracked_lists,
+        mock_are_dirs_modified,
+        mock_find_dir_timestamps,
+    ):
+        tracked_dirstamps = {"/mock/": 1.0}
+        mock_get_updated_tracked_lists.return_value = (
+            frozenset(["/mock/file1.md"]),
+            {"/mock/file1.md": 12345.0},
+        )
+
+        self.assertFalse(
+            is_needed_to_reload(
+                root_path=self.root_path,
+                tracked_files=frozenset(["/mock/file1.md"]),
+                tracked_filestamps={"/mock/file1.md": 12345.0},
+                tracked_dirstamps=tracked_dirstamps,
+            )
+        )
+        mock_get_updated_tracked_lists.assert_called_once_with(self.root_path)
+        self.assertDictEqual(tracked_dirstamps, {"/mock/": 2.0})
+
+    def test_find_dir_timestamps(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "content", "blog"))
+            os.makedirs(os.path.join(root, EXCLUDE_DIRS[0], "nested"))
+
+            dirstamps = find_dir_timestamps(root)
+
+            self.assertSetEqual(
+                set(dirstamps),
+                {
+                    root,
+                    os.path.join(root, "content"),
+                    os.path.join(root, "content", "blog"),
+                },
+            )
+            self.assertFalse(are_dirs_modified(dirstamps))
+
+            os.rmdir(os.path.join(root, "content", "blog"))
+            self.assertTrue(are_dirs_modified(dirstamps))
+
+
+class TestCustomHandler(unittest.TestCase):
+    def setUp(self):
+        self.build_site_handler = Mock()
+        self.handler = create_handler(
+            root_path="/mock/",
+            public_dir="/mock/public",
+            build_site_handler=self.build_site_handler,
+            tracked_files=frozenset(["/mock/file1.md"]),
+            tracked_filestamps={"/mock/file1.md": 12345.0},
+        )
+
+    @patch("src.core.server.is_needed_to_reload", return_value=False)
+    def test_reload_if_needed_no_changes(self, mock_is_needed_to_reload):
+        self.assertFalse(self.handler.reload_if_needed())
+        self.build_site_handler.assert_not_called()
+        self.assertEqual(self.handler.build_count, 0)
+
+    @patch("src.core.server.find_dir_timestamps", return_value={"/mock/": 1.0})
+    @patch("src.core.server.get_updated_tracked_lists")
+    @patch("src.core.server.is_needed_to_reload", return_value=True)
+    def test_reload_if_needed_changes(
+        self,
+        mock_is_needed_to_reload,
+        mock_get_updated_tracked_lists,
+        mock_find_dir_timestamps,
+    ):
+        mock_get_updated_tracked_lists.return_value = (
+            frozenset(["/mock/file1.md", "/mock/file2.md"]),
+            {"/mock/file1.md": 12345.0, "/mock/file2.md": 67890.0},
+        )
+
+        self.assertTrue(self.handler.reload_if_needed())
+
+        mock_is_needed_to_reload.assert_called_once_with(
+            "/mock/",
+            tracked_files=frozenset(["/mock/file1.md"]),
+            tracked_filestamps={"/mock/file1.md": 12345.0},
+            tracked_dirstamps=None,
+        )
+        self.build_site_handler.assert_called_once_with()
+        self.assertEqual(self.handler.build_count, 1)
+        self.assertEqual(
+            self.handler.tracked_files,
+            frozenset(["/mock/file1.md", "/mock/file2.md"]),
+        )
+        self.assertDictEqual(self.handler.tracked_dirstamps, {"/mock/": 1.0})
+
+    @patch("src.core.server.RELOAD_CHECK_INTERVAL", 0.01)
+    def test_watcher_only_checks_with_listeners(self):
+        checked = threading.Event()
+
+        def reload_if_needed():
+            # the last listener leaves, so the watcher goes back to sleep
+            self.handler.count_listener(-1)
+            checked.set()
+
+        with patch.object(self.handler, "reload_if_needed", reload_if_needed):
+            self.handler.start_watcher()
+            self.assertFalse(checked.wait(0.1))
+
+            self.handler.count_listener(1)
+            self.assertTrue(checked.wait(1))
+        self.assertEqual(self.handler.listeners, 0)
+
+
+class TestMyHttpRequestHandler(unittest.TestCase):
+    def setUp(self):
+        self.public_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.public_dir.cleanup)
+        self.html = b"<p>Hello, world!</p>" * 50
+        with open(os.path.join(self.public_dir.name, "index.html"), "wb") as f:
+            f.write(self.html)
+
+        handler = create_handler(
+            root_path=self.public_dir.name,
+            public_dir=self.public_dir.name,
+            build_site_handler=Mock(),
+            tracked_files=frozenset(),
+            tracked_filestamps={},
+        )
+        handler.log_message = Mock()
+        self.httpd = ThreadingHTTPServer(("localhost", 0), handler)
+        threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        ).start()
+        self.addCleanup(self.httpd.server_close)
+        self.addCleanup(self.httpd.shutdown)
+
+    def get(self, path, headers=None):
+        url = "http://localhost:{}{}".format(self.httpd.server_address[1], path)
+        try:
+            with urllib.request.urlopen(
+                urllib.request.Request(url, headers=headers or {})
+            ) as r:
+                return r.status, r.headers, r.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, b""
+
+    def test_gzip_response(self):
+        status, headers, body = self.get("/", {"Accept-Encoding": "gzip"})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Cache-Control"], "no-cache")
+        self.assertEqual(int(headers["Content-Length"]), len(body))
+        self.assertEqual(gzip.decompress(body), self.html)
+
+    def test_plain_response(self):
+        status, headers, body = self.get("/index.html")
+
+        self.assertEqual(status, 200)
+        self.assertIsNone(headers["Content-Encoding"])
+        self.assertEqual(body, self.html)
+
+    def test_redirects_to_html_file(self):
+        connection = http.client.HTTPConnection(*self.httpd.server_address)
+        self.addCleanup(connection.close)
+        connection.request("GET", "/index")
+        response = connection.getresponse()
+
+        self.assertEqual(response.status, 301)
+        self.assertTrue(response.getheader("Location").endswith("/index.html"))
+
+    def test_find_html_files(self):
+        os.makedirs(os.path.join(self.public_dir.name, "blog"))
+        with open(os.path.join(self.public_dir.name, "blog", "post.html"), "w"):
+            pass
+        with open(os.path.join(self.public_dir.name, "index.css"), "w"):
+            pass
+
+        self.assertEqual(
+            find_html_files(self.public_dir.name),
+            frozenset(
+                [
+                    os.path.join(self.public_dir.name, "index.html"),
+                    os.path.join(self.public_dir.name, "blog", "post.html"),
+                ]
+            ),
+        )
+
+    def test_not_modified_response(self):
+        _, headers, _ = self.get("/index.html")
+
+        status, _, body = self.get("/index.html", {"If-None-Match": headers["ETag"]})
+
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+
 
 if __name__ == "__main__":
     unittest.main()
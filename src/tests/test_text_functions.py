@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 import src.core.text_functions as tf
 from src.core.textnode import TextNode
 
@@ -48,6 +49,17 @@ class TestTextToHtmlNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             tf.text_node_to_html_node(text_node)
 
+    def test_conversion_is_cached(self):
+        tf.text_node_to_html_node.cache_clear()
+        leaf_node = tf.text_node_to_html_node(
+            TextNode(text="Repeated", text_type=tf.TEXT_TYPE_BOLD)
+        )
+        same_leaf_node = tf.text_node_to_html_node(
+            TextNode(text="Repeated", text_type=tf.TEXT_TYPE_BOLD)
+        )
+        self.assertIs(leaf_node, same_leaf_node)
+        self.assertEqual(tf.text_node_to_html_node.cache_info().hits, 1)
+
 
 class TestSplitNodes(unittest.TestCase):
     def test_without_delimiter(self):
@@ -209,6 +221,15 @@ class TestSplitNodeImage(unittest.TestCase):
         ]
         self.assertEqual(tf.split_nodes_image(nodes), nodes)
 
+    def test_data_url_image(self):
+        url = "data:image/png;base64," + "iVBORw0KGgo" * 100_000
+        nodes = [TextNode(f"![pixel]({url}) and ![broken]({url}", tf.TEXT_TYPE_TEXT)]
+        expected_nodes = [
+            TextNode("pixel", tf.TEXT_TYPE_IMAGE, url),
+            TextNode(f" and ![broken]({url}", tf.TEXT_TYPE_TEXT),
+        ]
+        self.assertEqual(tf.split_nodes_image(nodes), expected_nodes)
+
 
 class TestSplitNodeLink(unittest.TestCase):
     def test_single_link(self):
@@ -279,6 +300,16 @@ class TestSplitNodeLink(unittest.TestCase):
         with self.assertRaises(ValueError):
             tf.split_nodes_link(nodes)
 
+    def test_broken_link_after_link(self):
+        nodes = [
+            TextNode(
+                "This is a [link](http://example.com) and a [broken link.",
+                tf.TEXT_TYPE_TEXT,
+            )
+        ]
+        with self.assertRaises(ValueError):
+            tf.split_nodes_link(nodes)
+
 
 class TestTextToTextNode(unittest.TestCase):
     def test_plain_text(self):
@@ -371,5 +402,89 @@ class TestTextToTextNode(unittest.TestCase):
             tf.text_line_to_text_nodes(text)
 
 
+class TestTextLinesToTextNodes(unittest.TestCase):
+    def test_matches_line_by_line_conversion(self):
+        lines = [
+            "item with **bold**",
+            "*italic* item and a [link](http://example.com)",
+            "`code` and ![image](http://example.com/image.jpg)",
+        ]
+        self.assertEqual(
+            tf.text_lines_to_text_nodes(lines),
+            [tf.text_line_to_text_nodes(line) for line in lines],
+        )
+
+    def test_only_untokenized_lines_are_split(self):
+        lines = ["item with **bold**", "a `x``y` b", "*italic* item"]
+        with patch.object(
+            tf, "split_nodes_image", wraps=tf.split_nodes_image
+        ) as mock_split:
+            line_nodes = tf.text_lines_to_text_nodes(lines)
+        mock_split.assert_called_once_with([TextNode("a `x``y` b", tf.TEXT_TYPE_TEXT)])
+        self.assertEqual(
+            line_nodes, [tf.text_line_to_text_nodes(line) for line in lines]
+        )
+
+    def test_delimiters_do_not_span_lines(self):
+        with self.assertRaises(ValueError):
+            tf.text_lines_to_text_nodes(["a **bold", "text** item"])
+
+    def test_empty_lines(self):
+        self.assertEqual(tf.text_lines_to_text_nodes([]), [])
+
+
+class TestTokenizeTextLine(unittest.TestCase):
+    def test_mixed_markup(self):
+        self.assertEqual(
+            tf.tokenize_text_line(
+                "A ![pic](http://example.com/a.png), a [link](http://example.com)"
+                " with **bold**, *italic* and `code`!"
+            ),
+            [
+                TextNode("A ", tf.TEXT_TYPE_TEXT),
+                TextNode("pic", tf.TEXT_TYPE_IMAGE, "http://example.com/a.png"),
+                TextNode(", a ", tf.TEXT_TYPE_TEXT),
+                TextNode("link", tf.TEXT_TYPE_LINK, "http://example.com"),
+                TextNode(" with ", tf.TEXT_TYPE_TEXT),
+                TextNode("bold", tf.TEXT_TYPE_BOLD),
+                TextNode(", ", tf.TEXT_TYPE_TEXT),
+                TextNode("italic", tf.TEXT_TYPE_ITALIC),
+                TextNode(" and ", tf.TEXT_TYPE_TEXT),
+                TextNode("code", tf.TEXT_TYPE_CODE),
+                TextNode("!", tf.TEXT_TYPE_TEXT),
+            ],
+        )
+
+    def test_plain_text(self):
+        self.assertEqual(
+            tf.tokenize_text_line("Hello, world!"),
+            [TextNode("Hello, world!", tf.TEXT_TYPE_TEXT)],
+        )
+
+    def test_ambiguous_markup_is_left_to_split_functions(self):
+        for text in [
+            "",
+            "**bold with *italic* inside**",
+            "`code with a [bracket]`",
+            "[link with **bold**](http://example.com)",
+            "*italic***bold**",
+            "unclosed **bold",
+            "a [bracket] only",
+        ]:
+            self.assertIsNone(tf.tokenize_text_line(text), text)
+
+    def test_text_line_to_text_nodes_falls_back_to_split_functions(self):
+        self.assertEqual(
+            tf.text_line_to_text_nodes("**bold with *italic* inside**"),
+            [
+                TextNode("bold with ", tf.TEXT_TYPE_TEXT),
+                TextNode("italic", tf.TEXT_TYPE_ITALIC),
+                TextNode(" inside", tf.TEXT_TYPE_TEXT),
+            ],
+        )
+        with self.assertRaises(ValueError):
+            tf.text_line_to_text_nodes("a [bracket] only")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -58,6 +58,19 @@ class TestTextNodeEquality(unittest.TestCase):
         self.assertNotEqual(node1, node3)
 
 
+class TestTextNodeHash(unittest.TestCase):
+    def test_equal_nodes_have_equal_hashes(self):
+        node1 = TextNode(text="Hello", text_type="plain", url="http://example.com")
+        node2 = TextNode(text="Hello", text_type="plain", url="http://example.com")
+        self.assertEqual(hash(node1), hash(node2))
+        self.assertEqual(len({node1, node2}), 1)
+
+    def test_different_nodes_are_distinct_keys(self):
+        node1 = TextNode(text="Hello", text_type="plain")
+        node2 = TextNode(text="Hello", text_type="bold")
+        self.assertEqual(len({node1, node2}), 2)
+
+
 class TestTextNodeRepr(unittest.TestCase):
     def test_repr_with_url(self):
         node = TextNode(
@@ -1,187 +1,336 @@
 import os
+import shutil
+import tempfile
 import unittest
-from unittest.mock import patch, call, mock_open
+from unittest.mock import patch, call
 
 from src.core.utils import (
     copy_files_rec,
     copy_static_to_public,
     extract_title,
+    read_file,
+    write_file_chunks,
+    iter_template,
+    compile_template,
+    render_template,
     generate_page,
+    generate_page_from_paths,
     generate_page_recursive,
+    find_pages_rec,
+    find_files_rec,
+    find_file_timestamps,
+    find_files_and_stamps_rec,
+    remove_stale_files,
     build_site,
 )
 
 
 class TestCopyStaticToPublic(unittest.TestCase):
-    @patch("src.core.utils.copy_files_rec")
+    @patch("src.core.utils.sync_static")
     @patch("src.core.utils.shutil")
-    @patch("src.core.utils.os")
-    def test_copy_static_to_public(self, mock_os, mock_shutil, mock_copy_files_rec):
+    def test_copy_static_to_public(self, mock_shutil, mock_sync_static):
         static_dir = os.path.join("src", "static")
         public_dir = "public"
 
-        # Setup mock
-        mock_os.path.exists.return_value = True
-
         # Run the function
-        copy_static_to_public(static_dir, public_dir)
+        static_files = copy_static_to_public(static_dir, public_dir)
 
-        # Assert calls
-        mock_os.assert_has_calls(
-            [call.path.exists(public_dir), call.mkdir(public_dir)], any_order=True
-        )
-        mock_shutil.rmtree.assert_called_once_with(public_dir)
-        mock_copy_files_rec.assert_called_once_with(static_dir, public_dir)
+        # Assert calls, the existing public directory is kept
+        self.assertFalse(mock_shutil.rmtree.called)
+        mock_sync_static.assert_called_once_with(static_dir, public_dir)
+        self.assertEqual(static_files, mock_sync_static.return_value)
 
-    @patch("src.core.utils.copy_files_rec")
-    @patch("src.core.utils.shutil")
-    @patch("src.core.utils.os")
-    def test_copy_static_to_public_no_existing_public(
-        self, mock_os, mock_shutil, mock_copy_files_rec
-    ):
-        static_dir = "src/static"
-        public_dir = "public"
+    @patch("builtins.print")
+    def test_copy_static_to_public_no_existing_public(self, mock_print):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            static_dir = os.path.join(tmp_dir, "static")
+            public_dir = os.path.join(tmp_dir, "public")
+            os.makedirs(static_dir)
+            src_path = os.path.join(static_dir, "style.css")
+            with open(src_path, "w") as f:
+                f.write("body {}")
+
+            static_files = copy_static_to_public(static_dir, public_dir)
+
+            dst_path = os.path.join(public_dir, "style.css")
+            mock_print.assert_any_call(f"Creating {public_dir}")
+            self.assertEqual(static_files, {dst_path})
+            self.assertEqual(read_file(dst_path), "body {}")
+            # the copy keeps the mtime of its source
+            self.assertEqual(
+                os.stat(dst_path).st_mtime_ns, os.stat(src_path).st_mtime_ns
+            )
 
-        # Setup mock
-        mock_os.path.exists.return_value = False
+    @patch("builtins.print")
+    def test_copy_static_to_public_only_copies_changed_files(self, mock_print):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            static_dir = os.path.join(tmp_dir, "static")
+            public_dir = os.path.join(tmp_dir, "public")
+            os.makedirs(static_dir)
+            for name in ["index.css", "style.css"]:
+                with open(os.path.join(static_dir, name), "w") as f:
+                    f.write("body {}")
+            copy_static_to_public(static_dir, public_dir)
+
+            # e.g. restored from a backup with cp -p
+            src_path = os.path.join(static_dir, "index.css")
+            with open(src_path, "w") as f:
+                f.write("p {}")
+            past = os.stat(src_path).st_mtime - 10
+            os.utime(src_path, (past, past))
+            with patch("shutil.copyfile", wraps=shutil.copyfile) as mock_copyfile:
+                copy_static_to_public(static_dir, public_dir)
+
+            mock_copyfile.assert_called_once_with(
+                src=src_path, dst=os.path.join(public_dir, "index.css")
+            )
+            self.assertEqual(read_file(os.path.join(public_dir, "index.css")), "p {}")
 
-        # Run the function
-        copy_static_to_public(static_dir, public_dir)
+    @patch("builtins.print")
+    def test_copy_static_to_public_missing_static(self, mock_print):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            public_dir = os.path.join(tmp_dir, "public")
 
-        # Assert calls
-        mock_os.path.exists.assert_called_once_with(public_dir)
-        self.assertFalse(mock_shutil.rmtree.called)
-        mock_os.mkdir.assert_called_once_with(public_dir)
-        mock_copy_files_rec.assert_called_once_with(static_dir, public_dir)
+            with self.assertRaises(FileNotFoundError):
+                copy_static_to_public(os.path.join(tmp_dir, "static"), public_dir)
+
+            self.assertFalse(os.path.exists(public_dir))
+            mock_print.assert_not_called()
 
 
 class TestCopyFilesRec(unittest.TestCase):
-    @patch("src.core.utils.os.path.exists")
-    def test_copy_files_rec_source_file_not_found(self, mock_exists):
-        mock_exists.return_value = False
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src = os.path.join(self.tmp.name, "a")
+        self.dst = os.path.join(self.tmp.name, "b")
+        os.makedirs(os.path.join(self.src, "subdir"))
+        for rel_path in ["file1.txt", os.path.join("subdir", "file2.txt")]:
+            with open(os.path.join(self.src, rel_path), "w") as f:
+                f.write(rel_path)
+
+    def test_copy_files_rec_source_file_not_found(self):
         with self.assertRaises(FileNotFoundError):
-            copy_files_rec("a", "b")
+            copy_files_rec(os.path.join(self.tmp.name, "missing"), self.dst)
+        self.assertFalse(os.path.exists(self.dst))
 
-    @patch("src.core.utils.os.listdir")
-    @patch("src.core.utils.os.makedirs")
-    @patch("src.core.utils.os.path.exists")
-    def test_copy_files_rec_destination_not_exists(
-        self, mock_exists, mock_makedirs, mock_listdir
-    ):
-        mock_exists.side_effect = lambda x: False if x != "a" else True
-        mock_listdir.return_value = []  # do not enter the for loop
+    @patch("builtins.print")
+    def test_copy_files_rec_destination_not_exists(self, mock_print):
+        copy_files_rec(os.path.join(self.src, "subdir"), self.dst)
 
-        copy_files_rec("a", "b")
+        self.assertEqual(os.listdir(self.dst), ["file2.txt"])
 
-        mock_makedirs.assert_called_once_with("b", exist_ok=True)
+    @patch("builtins.print")
+    def test_copy_files_rec_destination_exists(self, mock_print):
+        os.makedirs(os.path.join(self.dst, "subdir"))
+        with open(os.path.join(self.dst, "subdir", "file2.txt"), "w") as f:
+            f.write("stale")
 
-    @patch("src.core.utils.os.listdir")
-    @patch("src.core.utils.os.makedirs")
-    @patch("src.core.utils.os.path.exists")
-    def test_copy_files_rec_destination_exists(
-        self, mock_exists, mock_makedirs, mock_listdir
-    ):
-        mock_exists.return_value = True
-        mock_listdir.return_value = []  # do not enter the for loop
+        copy_files_rec(self.src, self.dst)
 
-        copy_files_rec("a", "b")
+        with open(os.path.join(self.dst, "subdir", "file2.txt")) as f:
+            self.assertEqual(f.read(), os.path.join("subdir", "file2.txt"))
 
-        self.assertFalse(mock_makedirs.called)
+    @patch("shutil.copyfile")
+    @patch("builtins.print")
+    def test_copy_files_rec_success(self, mock_print, mock_copy):
+        copy_files_rec(self.src, self.dst)
 
-    @patch("src.core.utils.shutil")
-    @patch("src.core.utils.os")
-    def test_copy_files_rec_success(self, mock_os, mock_shutil):
-        # Setup mock for os.path.exists
-        def path_exists_side_effect(path):
-            if path == "a":
-                return True
-            if path == "b":
-                return False
-            if path == os.path.join("a", "subdir"):
-                return True
-            if path == os.path.join("b", "subdir"):
-                return False
-            return False
-
-        mock_os.path.exists.side_effect = path_exists_side_effect
-
-        # Setup mock for os.path.isfile
-        def is_file_side_effect(path):
-            if path == os.path.join("a", "file1.txt"):
-                return True
-            if path == os.path.join("a", "subdir"):
-                return False
-            if path == os.path.join("a", "subdir", "file2.txt"):
-                return True
-            return False
-
-        mock_os.path.isfile.side_effect = is_file_side_effect
-
-        # Setup mock for os.path.isdir
-        def is_dir_side_effect(path):
-            if path == os.path.join("a", "subdir"):
-                return True
-            return False
-
-        mock_os.path.isdir.side_effect = is_dir_side_effect
-
-        # Setup mock for os.listdir
-        def listdir_side_effect(path):
-            if path == "a":
-                return ["file1.txt", "subdir"]
-            if path == os.path.join("a", "subdir"):
-                return ["file2.txt"]
-            return []
-
-        mock_os.listdir.side_effect = listdir_side_effect
-
-        # Setup mock for os.path.join
-        def join_side_effect(a, b):
-            return f"{a}/{b}"
-
-        mock_os.path.join.side_effect = join_side_effect
+        self.assertTrue(os.path.isdir(os.path.join(self.dst, "subdir")))
+        expected_shutil_calls = [
+            call(
+                src=os.path.join(self.src, "file1.txt"),
+                dst=os.path.join(self.dst, "file1.txt"),
+            ),
+            call(
+                src=os.path.join(self.src, "subdir", "file2.txt"),
+                dst=os.path.join(self.dst, "subdir", "file2.txt"),
+            ),
+        ]
+        mock_copy.assert_has_calls(expected_shutil_calls, any_order=True)
+        self.assertEqual(mock_copy.call_count, 2)
 
-        # Run the function
-        copy_files_rec("a", "b")
+    @patch("builtins.print")
+    def test_copy_files_rec_logs_only_when_verbose(self, mock_print):
+        copy_files_rec(self.src, self.dst)
+        mock_print.assert_not_called()
 
-        # Assert calls
-        expected_os_calls = [
-            call.path.exists("a"),
-            call.path.exists("b"),
-            call.makedirs("b", exist_ok=True),
-            call.listdir("a"),
-            call.path.join("a", "file1.txt"),
-            call.path.join("b", "file1.txt"),
-            call.path.isfile("a/file1.txt"),
-            call.path.join("a", "subdir"),
-            call.path.join("b", "subdir"),
-            call.path.isfile("a/subdir"),
-            call.path.isdir("a/subdir"),
-            call.path.exists("b/subdir"),
-            call.mkdir("b/subdir"),
-            call.path.exists("a/subdir"),
-            call.path.exists("b/subdir"),
-            call.makedirs("b/subdir", exist_ok=True),
-            call.listdir("a/subdir"),
-            call.path.join("a/subdir", "file2.txt"),
-            call.path.join("b/subdir", "file2.txt"),
-            call.path.isfile("a/subdir/file2.txt"),
-        ]
+        with patch("src.core.utils.VERBOSE", True):
+            copy_files_rec(self.src, self.dst)
+        self.assertEqual(mock_print.call_count, 2)
 
-        mock_os.assert_has_calls(expected_os_calls, any_order=True)
+    @patch("builtins.print")
+    def test_copy_files_rec_single_thread(self, mock_print):
+        copy_files_rec(self.src, self.dst, concurrency=1)
 
-        expected_shutil_calls = [
-            call.copy(
-                src=os.path.join("a", "file1.txt"),
-                dst=os.path.join("b", "file1.txt"),
-            ),
-            call.copy(
-                src=os.path.join("a", "subdir", "file2.txt"),
-                dst=os.path.join("b", "subdir", "file2.txt"),
+        with open(os.path.join(self.dst, "subdir", "file2.txt")) as f:
+            self.assertEqual(f.read(), os.path.join("subdir", "file2.txt"))
+
+
+class TestRemoveStaleFiles(unittest.TestCase):
+    @patch("builtins.print")
+    def test_removes_stale_files_and_emptied_directories(self, mock_print):
+        with tempfile.TemporaryDirectory() as public_dir:
+            paths = {
+                rel_path: os.path.join(public_dir, rel_path)
+                for rel_path in [
+                    "index.html",
+                    "old.html",
+                    os.path.join("blog", "post.html"),
+                    os.path.join("old", "deep", "page.html"),
+                ]
+            }
+            for path in paths.values():
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write("x")
+            os.makedirs(os.path.join(public_dir, "empty"))
+
+            remove_stale_files(
+                public_dir,
+                {paths["index.html"], paths[os.path.join("blog", "post.html")]},
+            )
+
+            self.assertCountEqual(
+                [
+                    os.path.relpath(os.path.join(dirpath, name), public_dir)
+                    for dirpath, dirnames, filenames in os.walk(public_dir)
+                    for name in dirnames + filenames
+                ],
+                [
+                    "index.html",
+                    "blog",
+                    os.path.join("blog", "post.html"),
+                    "empty",
+                ],
+            )
+
+
+class TestFindFilesAndStampsRec(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        for rel_path in [
+            "index.md",
+            "style.css",
+            "notes.txt",
+            ".hidden.md",
+            "skip.md",
+            "content/blog/post.md",
+            "content/blog/page.html",
+            "public/index.html",
+        ]:
+            path = os.path.join(self.root, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("x")
+
+    def test_matches_find_files_rec(self):
+        kwargs = dict(
+            path=self.root,
+            exclude_dirs=["public"],
+            exclude_files=["skip.md"],
+            filetypes_to_monitor=["md", "html", "css"],
+        )
+        expected_files = find_files_rec(**kwargs)
+
+        files, f_times = find_files_and_stamps_rec(**kwargs)
+
+        self.assertCountEqual(files, expected_files)
+        self.assertCountEqual(
+            files,
+            [
+                os.path.join(self.root, "index.md"),
+                os.path.join(self.root, "style.css"),
+                os.path.join(self.root, "content", "blog", "post.md"),
+                os.path.join(self.root, "content", "blog", "page.html"),
+            ],
+        )
+        self.assertDictEqual(f_times, find_file_timestamps(expected_files))
+
+    def test_find_files_rec_defaults(self):
+        self.assertEqual(find_files_rec(self.root), [])
+        self.assertCountEqual(
+            find_files_rec(self.root, filetypes_to_monitor=["css", "html"]),
+            [
+                os.path.join(self.root, "style.css"),
+                os.path.join(self.root, "content", "blog", "page.html"),
+                os.path.join(self.root, "public", "index.html"),
+            ],
+        )
+
+    def test_missing_directory(self):
+        self.assertEqual(
+            find_files_and_stamps_rec(
+                path=os.path.join(self.root, "missing"),
+                exclude_dirs=[],
+                exclude_files=[],
+                filetypes_to_monitor=["md"],
             ),
-        ]
+            ([], {}),
+        )
+
+
+class TestReadWriteFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "file.md")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        write_file_chunks(self.path, ["# Título\n", "Content ✓"])
+        self.assertEqual(read_file(self.path), "# Título\nContent ✓")
+
+    def test_read_normalizes_line_endings(self):
+        with open(self.path, "wb") as f:
+            f.write(b"# Title\r\nLine\rContent\n")
+        self.assertEqual(read_file(self.path), "# Title\nLine\nContent\n")
+
+    def test_read_file_grown_since_stat(self):
+        write_file_chunks(self.path, ["# Title\n", "Content " * 100])
+        with patch("src.core.utils.os.fstat") as mock_fstat:
+            mock_fstat.return_value.st_size = 3
+            self.assertEqual(read_file(self.path), "# Title\n" + "Content " * 100)
+
+    def test_read_file_short_reads(self):
+        write_file_chunks(self.path, ["# Title\n", "Content " * 100])
+        real_read = os.read
+        with patch(
+            "src.core.utils.os.read", side_effect=lambda fd, n: real_read(fd, 7)
+        ):
+            self.assertEqual(read_file(self.path), "# Title\n" + "Content " * 100)
+
+    def test_write_replaces_content(self):
+        write_file_chunks(self.path, ["old content"])
+        write_file_chunks(self.path, ["new"])
+        self.assertEqual(read_file(self.path), "new")
+
+    def test_write_removes_partial_file_on_error(self):
+        def chunks():
+            yield "<div>"
+            raise ValueError("Invalid markdown syntax")
 
-        mock_shutil.assert_has_calls(expected_shutil_calls, any_order=True)
+        with self.assertRaises(ValueError):
+            write_file_chunks(self.path, chunks())
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_write_error_keeps_previous_content(self):
+        def chunks():
+            yield "<div>"
+            raise ValueError("Invalid markdown syntax")
+
+        write_file_chunks(self.path, ["old content"])
+        with self.assertRaises(ValueError):
+            write_file_chunks(self.path, chunks())
+        self.assertEqual(read_file(self.path), "old content")
+
+    def test_read_file_not_found(self):
+        with self.assertRaises(FileNotFoundError):
+            read_file(os.path.join(self.tmp_dir.name, "missing.md"))
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -207,6 +356,26 @@ Some content here.
         with self.assertRaises(ValueError):
             extract_title(text)
 
+    def test_h1_header_not_on_first_line(self):
+        text = "Intro paragraph\n\n## Subheader\n# Actual Title\n# Second Title"
+        self.assertEqual(extract_title(text), "Actual Title")
+
+    def test_h1_header_with_windows_line_endings(self):
+        text = "# Title\r\nContent\r\n"
+        self.assertEqual(extract_title(text), "Title")
+
+    def test_empty_h1_header_is_skipped(self):
+        text = "#   \n# Title"
+        self.assertEqual(extract_title(text), "Title")
+
+    def test_only_empty_h1_header(self):
+        with self.assertRaises(ValueError):
+            extract_title("# \nContent")
+
+    def test_h1_header_requires_space(self):
+        with self.assertRaises(ValueError):
+            extract_title("#Title\n#\tTitle")
+
     def test_h1_header_with_special_characters(self):
         text = "# Title with special characters !@#$%^&*()"
         self.assertEqual(
@@ -220,59 +389,132 @@ Some content here.
         )
 
 
+class TestRenderTemplate(unittest.TestCase):
+    def test_compile_template(self):
+        template = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+        self.assertEqual(
+            compile_template(template),
+            ("<title>", "Title", "</title><body>", "Content", "</body>"),
+        )
+
+    def test_compile_template_without_placeholders(self):
+        self.assertEqual(compile_template("<html></html>"), ("<html></html>",))
+
+    def test_render_template(self):
+        template = "<title>{{ Title }}</title><body>{{Content}}</body>"
+        self.assertEqual(
+            render_template(template, {"Title": "Hello", "Content": "<p>Hi</p>"}),
+            "<title>Hello</title><body><p>Hi</p></body>",
+        )
+
+    def test_iter_template(self):
+        chunks = iter_template(
+            "<title>{{ Title }}</title><body>{{ Content }}</body>",
+            {"Title": ["Title"], "Content": iter(["<div>", "<p>a</p>", "</div>"])},
+        )
+        self.assertEqual(
+            "".join(chunks),
+            "<title>Title</title><body><div><p>a</p></div></body>",
+        )
+
+    def test_iter_template_repeated_placeholder(self):
+        chunks = iter_template(
+            "{{ Content }}|{{ Content }}", {"Content": iter(["a", "b"])}
+        )
+        self.assertEqual("".join(chunks), "ab|ab")
+
+    def test_render_template_repeated_placeholder(self):
+        template = "{{ Title }} - {{ Title }}"
+        self.assertEqual(
+            render_template(template, {"Title": "Hello", "Content": ""}),
+            "Hello - Hello",
+        )
+
+
 class TestGeneratePage(unittest.TestCase):
-    @patch("src.core.utils.os.path.isfile")
-    def test_generate_page_source_file_not_found(self, mock_isfile):
-        mock_isfile.side_effect = lambda x: x == "template.html"
+    @patch("builtins.print")
+    def test_generate_page_source_file_not_found(self, mock_print):
         with self.assertRaises(FileNotFoundError):
-            generate_page("non_existent_src.md", "template.html", "dest.html")
+            generate_page("non_existent_src.md", "{{ Content }}", "dest.html")
+        mock_print.assert_not_called()
 
-    @patch("os.path.isfile")
-    def test_generate_page_template_file_not_found(self, mock_isfile):
-        mock_isfile.side_effect = lambda x: x == "src.md"
+    def test_generate_page_template_file_not_found(self):
         with self.assertRaises(FileNotFoundError):
-            generate_page("src.md", "non_existent_template.html", "dest.html")
+            generate_page_from_paths(
+                "src.md", "non_existent_template.html", "dest.html"
+            )
 
-    @patch(
-        "builtins.open", new_callable=mock_open, read_data="## No h1 header\nContent"
-    )
-    @patch("os.path.isfile")
-    def test_generate_page_no_h1_header(self, mock_isfile, mock_open):
-        mock_isfile.side_effect = lambda x: True
+    @patch("src.core.utils.read_file", return_value="## No h1 header\nContent")
+    def test_generate_page_no_h1_header(self, mock_read_file):
         with self.assertRaises(ValueError):
-            generate_page("src.md", "template.html", "dest.html")
+            generate_page("src.md", "{{ Content }}", "dest.html")
 
-    @patch("src.core.utils.open", new_callable=mock_open)
+    @patch("src.core.utils.write_file_chunks")
+    @patch("src.core.utils.read_file", return_value="# Sample Title")
     @patch("src.core.utils.os")
-    def test_generate_page_success(self, mock_os, mock_file_open):
+    def test_generate_page_with_loaded_template(
+        self, mock_os, mock_read_file, mock_write_file
+    ):
         # Setup Mock
-        mock_os.path.isfile.side_effect = lambda x: True
         mock_os.path.dirname.return_value = "dir"
-        mock_os.path.exists.return_value = False
-        mock_file_a = mock_open(read_data="# Sample Title\nContent").return_value
-        mock_file_b = mock_open(
-            read_data="<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
-        ).return_value
-        mock_file_c = mock_open().return_value
-        expected_output = "<html><head><title>Sample Title</title></head><body><div><h1>Sample Title\nContent</h1></div></body></html>"
+        written = dict()
+        mock_write_file.side_effect = lambda path, chunks: written.update(
+            {path: "".join(chunks)}
+        )
 
-        # Configure mock to return the mock file handles in order
-        mock_file_open.side_effect = [mock_file_a, mock_file_b, mock_file_c]
+        # Run function
+        generate_page("src.md", "<title>{{ Title }}</title>", "dest.html")
+
+        # Assert calls, the template must not be read from disk and the
+        # existing destination directory isn't created again
+        mock_os.path.isfile.assert_not_called()
+        mock_os.makedirs.assert_not_called()
+        mock_read_file.assert_called_once_with("src.md")
+        self.assertEqual(written, {"dest.html": "<title>Sample Title</title>"})
+
+    @patch("src.core.utils.write_file_chunks")
+    @patch("src.core.utils.read_file")
+    @patch("src.core.utils.os")
+    def test_generate_page_success(self, mock_os, mock_read_file, mock_write_file):
+        # Setup Mock
+        mock_os.path.dirname.return_value = "dir"
+        mock_os.path.isdir.return_value = False
+        files = {
+            "src.md": "# Sample Title\nContent",
+            "template.html": "<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>",
+        }
+        mock_read_file.side_effect = files.__getitem__
+        written = dict()
+
+        def write_file_chunks(path, chunks):
+            # the destination directory is missing until makedirs is called
+            if not mock_os.makedirs.called:
+                raise FileNotFoundError(path)
+            written[path] = "".join(chunks)
+
+        mock_write_file.side_effect = write_file_chunks
+        expected_output = "<html><head><title>Sample Title</title></head><body><div><h1>Sample Title\nContent</h1></div></body></html>"
 
         # Run function
-        generate_page("src.md", "template.html", "dest.html")
+        generate_page_from_paths("src.md", "template.html", "dest.html")
 
         # Assert calls
-        mock_os.path.isfile.assert_has_calls([call("src.md"), call("template.html")])
-        mock_file_open.assert_any_call("src.md", "r")
-        mock_file_a.read.assert_called_once()
-        mock_file_open.assert_any_call("template.html", "r")
-        mock_file_b.read.assert_called_once()
+        mock_read_file.assert_has_calls([call("template.html"), call("src.md")])
         mock_os.path.dirname.assert_any_call("dest.html")
-        mock_os.path.exists.assert_any_call("dir")
-        mock_os.makedirs.assert_any_call("dir")
-        mock_file_open.assert_any_call("dest.html", "w")
-        mock_file_c.write.assert_called_once_with(expected_output)
+        mock_os.makedirs.assert_called_once_with("dir", exist_ok=True)
+        self.assertEqual(written, {"dest.html": expected_output})
+
+    @patch("src.core.utils.write_file_chunks")
+    @patch("src.core.utils.read_file", return_value="# Sample Title")
+    def test_generate_page_write_error_is_not_retried(
+        self, mock_read_file, mock_write_file
+    ):
+        mock_write_file.side_effect = FileNotFoundError("dest.html.tmp")
+
+        with self.assertRaises(FileNotFoundError):
+            generate_page("src.md", "{{ Content }}", "dest.html")
+
+        mock_write_file.assert_called_once()
 
     @patch("src.core.utils.os.path.isdir")
     def test_generate_page_recursive_content_dir_not_found(self, mock_isdir):
@@ -280,90 +522,164 @@ class TestGeneratePage(unittest.TestCase):
         with self.assertRaises(FileNotFoundError):
             generate_page_recursive("non_existent_content", "template.html", "dest")
 
-    @patch("src.core.utils.os.path.isfile")
-    def test_generate_page_recursive_template_file_not_found(self, mock_isfile):
-        mock_isfile.side_effect = lambda x: x == "content"
+    @patch("src.core.utils.os.path.isdir", return_value=True)
+    def test_generate_page_recursive_template_file_not_found(self, mock_isdir):
         with self.assertRaises(FileNotFoundError):
             generate_page_recursive("content", "non_existent_template.html", "dest")
 
-    @patch("src.core.utils.os")
-    def test_generate_page_recursive(self, mock_os):
-        # Setup mock for os.path.isfile
-        def is_file_side_effect(file_path):
-            if file_path == "template.html":
-                return True
-            if file_path == os.path.join("content", "file1.md"):
-                return True
-            if file_path == os.path.join("content", "subdir"):
-                return False
-            if file_path == os.path.join("content", "subdir", "file2.md"):
-                return True
-            return False
-
-        mock_os.path.isfile.side_effect = is_file_side_effect
-
-        # Setup mock for os.path.isdir
-        def is_dir_side_effect(path):
-            if path == "content":
-                return True
-            if path == os.path.join("content", "subdir"):
-                return True
-            return False
-
-        mock_os.path.isdir.side_effect = is_dir_side_effect
-
-        # Setup mock for os.listdir
-        def listdir_side_effect(path):
-            if path == "content":
-                return ["file1.md", "subdir"]
-            if path == os.path.join("content", "subdir"):
-                return ["file2.md"]
-            return []
-
-        mock_os.listdir.side_effect = listdir_side_effect
-
-        # Setup mock for os.path.join
-        def join_side_effect(a, b):
-            return f"{a}/{b}"
-
-        mock_os.path.join.side_effect = join_side_effect
+    @patch("builtins.print")
+    def test_generate_page_reuses_unchanged_source(self, mock_print):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            src_path = os.path.join(tmp_dir, "src.md")
+            dest_path = os.path.join(tmp_dir, "dest.html")
+            cache_dir = os.path.join(tmp_dir, "cache")
+            with open(src_path, "w") as f:
+                f.write("# Title")
+
+            with patch("src.core.utils.read_file", wraps=read_file) as mock_read:
+                generate_page(src_path, "{{ Content }}", dest_path, cache_dir)
+                generate_page(src_path, "{{ Title }}", dest_path, cache_dir)
+                mock_read.assert_called_once_with(src_path)
+                self.assertEqual(read_file(dest_path), "Title")
+
+                # a modified source is read and rendered again
+                with open(src_path, "w") as f:
+                    f.write("# New Title!")
+                generate_page(src_path, "{{ Title }}", dest_path, cache_dir)
+                self.assertEqual(mock_read.call_count, 2)
+                self.assertEqual(read_file(dest_path), "New Title!")
+
+    def test_find_pages_rec(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            content_dir = os.path.join(tmp_dir, "content")
+            os.makedirs(os.path.join(content_dir, "subdir", "empty"))
+            for path in [("file1.md",), ("subdir", "file2.md")]:
+                with open(os.path.join(content_dir, *path), "w") as f:
+                    f.write("# Title")
+
+            pages, dest_dirs = find_pages_rec(content_dir, "dest")
+
+            self.assertEqual(
+                sorted(pages),
+                [
+                    (
+                        os.path.join(content_dir, "file1.md"),
+                        os.path.join("dest", "file1.html"),
+                    ),
+                    (
+                        os.path.join(content_dir, "subdir", "file2.md"),
+                        os.path.join("dest", "subdir", "file2.html"),
+                    ),
+                ],
+            )
+            self.assertEqual(
+                dest_dirs,
+                {
+                    "dest",
+                    os.path.join("dest", "subdir"),
+                    os.path.join("dest", "subdir", "empty"),
+                },
+            )
 
-        # Assert calls
-        with patch("src.core.utils.generate_page") as mock_generate_page:
-            generate_page_recursive("content", "template.html", "dest")
-
-            expected_os_calls = [
-                call.path.isdir("content"),
-                call.path.isfile("template.html"),
-                call.listdir("content"),
-                call.path.join("content", "file1.md"),
-                call.path.join("dest", "file1.md"),
-                call.path.isfile("content/file1.md"),
-                call.path.join("content", "subdir"),
-                call.path.join("dest", "subdir"),
-                call.path.isfile("content/subdir"),
-                call.path.isdir("content/subdir"),
-                call.path.join("dest", "subdir"),
-                call.makedirs("dest/subdir", exist_ok=True),
-                call.path.isdir("content/subdir"),
-                call.path.isfile("template.html"),
-                call.listdir("content/subdir"),
-                call.path.join("content/subdir", "file2.md"),
-                call.path.join("dest/subdir", "file2.md"),
-                call.path.isfile("content/subdir/file2.md"),
-            ]
-            mock_os.assert_has_calls(expected_os_calls)
+    def test_find_pages_rec_other_extensions(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ("post.markdown", "notes.mdx", "README"):
+                with open(os.path.join(tmp_dir, name), "w") as f:
+                    f.write("# Title")
+
+            pages, _ = find_pages_rec(tmp_dir, "dest")
+
+            self.assertEqual(
+                sorted(dest_file for _, dest_file in pages),
+                [
+                    os.path.join("dest", "README.html"),
+                    os.path.join("dest", "notes.html"),
+                    os.path.join("dest", "post.html"),
+                ],
+            )
+
+    def test_generate_page_recursive(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            content_dir = os.path.join(tmp_dir, "content")
+            dest_dir = os.path.join(tmp_dir, "dest")
+            template_path = os.path.join(tmp_dir, "template.html")
+            os.makedirs(os.path.join(content_dir, "subdir"))
+            for path in [("file1.md",), ("subdir", "file2.md")]:
+                with open(os.path.join(content_dir, *path), "w") as f:
+                    f.write("# Title")
+            with open(template_path, "w") as f:
+                f.write("{{ Title }}")
+
+            with patch("src.core.utils.generate_page") as mock_generate_page:
+                generate_page_recursive(
+                    content_dir, template_path, dest_dir, concurrency=1
+                )
 
             mock_generate_page.assert_has_calls(
                 [
-                    call("content/file1.md", "template.html", "dest/file1.html"),
                     call(
-                        "content/subdir/file2.md",
-                        "template.html",
-                        "dest/subdir/file2.html",
+                        os.path.join(content_dir, "file1.md"),
+                        "{{ Title }}",
+                        os.path.join(dest_dir, "file1.html"),
+                        None,
+                    ),
+                    call(
+                        os.path.join(content_dir, "subdir", "file2.md"),
+                        "{{ Title }}",
+                        os.path.join(dest_dir, "subdir", "file2.html"),
+                        None,
                     ),
                 ],
+                any_order=True,
             )
+            self.assertTrue(os.path.isdir(os.path.join(dest_dir, "subdir")))
+
+    @patch("src.core.utils.generate_page")
+    @patch("src.core.utils.ProcessPoolExecutor")
+    def test_generate_page_recursive_small_site_is_sequential(
+        self, mock_executor, mock_generate_page
+    ):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            content_dir = os.path.join(tmp_dir, "content")
+            template_path = os.path.join(tmp_dir, "template.html")
+            os.makedirs(content_dir)
+            for path in [("content", "file1.md"), ("content", "file2.md")]:
+                with open(os.path.join(tmp_dir, *path), "w") as f:
+                    f.write("# Title")
+            with open(template_path, "w") as f:
+                f.write("{{ Title }}")
+
+            generate_page_recursive(
+                content_dir, template_path, os.path.join(tmp_dir, "dest"), concurrency=4
+            )
+
+            mock_executor.assert_not_called()
+            self.assertEqual(mock_generate_page.call_count, 2)
+
+    @patch("src.core.utils.MIN_PARALLEL_PAGES", 2)
+    @patch("builtins.print")
+    def test_generate_page_recursive_parallel(self, mock_print):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            content_dir = os.path.join(tmp_dir, "content")
+            dest_dir = os.path.join(tmp_dir, "dest")
+            template_path = os.path.join(tmp_dir, "template.html")
+            os.makedirs(os.path.join(content_dir, "subdir"))
+            page_paths = [("file1.md",), ("file2.md",), ("subdir", "file3.md")]
+            for ix, path in enumerate(page_paths):
+                with open(os.path.join(content_dir, *path), "w") as f:
+                    f.write(f"# Title {ix}")
+            with open(template_path, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+
+            generate_page_recursive(content_dir, template_path, dest_dir, concurrency=2)
+
+            for ix, path in enumerate(page_paths):
+                dest_file = os.path.join(dest_dir, *path)[:-2] + "html"
+                with open(dest_file, "r") as f:
+                    self.assertEqual(
+                        f.read(),
+                        f"<title>Title {ix}</title><div><h1>Title {ix}</h1></div>",
+                    )
 
 
 class TestBuildSite(unittest.TestCase):
@@ -449,6 +765,9 @@ class TestBuildSite(unittest.TestCase):
             content_dir=self.content_dir,
             template_path=self.template_path,
             dest_path=self.dest_path,
+            cache_dir=None,
+            concurrency=None,
+            incremental=False,
         )
         mock_copy_static.assert_called_once_with(
             static_dir=self.static_dir, public_dir=self.dest_path
@@ -481,8 +800,114 @@ class TestBuildSite(unittest.TestCase):
             content_dir=self.content_dir,
             template_path=self.template_path,
             dest_path=self.dest_path,
+            cache_dir=None,
+            concurrency=None,
+            incremental=False,
         )
 
+    @patch("builtins.print")
+    def test_build_site_incremental_rebuild(self, mock_print):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            static_dir = os.path.join(tmp_dir, "static")
+            content_dir = os.path.join(tmp_dir, "content")
+            dest_path = os.path.join(tmp_dir, "public")
+            os.makedirs(static_dir)
+            os.makedirs(content_dir)
+            files = {
+                os.path.join(static_dir, "style.css"): "body {}",
+                os.path.join(static_dir, "old.css"): "p {}",
+                os.path.join(content_dir, "index.md"): "# Index",
+                os.path.join(content_dir, "about.md"): "# About",
+            }
+            for path, text in files.items():
+                with open(path, "w") as f:
+                    f.write(text)
+
+            build_function = build_site(
+                static_dir, content_dir, self.template_path, dest_path
+            )
+            build_function()
+
+            # edit a page, delete a static file and a page
+            index_path = os.path.join(content_dir, "index.md")
+            with open(index_path, "w") as f:
+                f.write("# New Index")
+            future = os.stat(os.path.join(dest_path, "index.html")).st_mtime + 10
+            os.utime(index_path, (future, future))
+            os.remove(os.path.join(static_dir, "old.css"))
+            os.remove(os.path.join(content_dir, "about.md"))
+
+            with patch("src.core.utils.copy_file") as mock_copy_file, patch(
+                "src.core.utils.generate_page", wraps=generate_page
+            ) as mock_generate_page:
+                build_function()
+
+            mock_copy_file.assert_not_called()
+            mock_generate_page.assert_called_once()
+            self.assertCountEqual(os.listdir(dest_path), ["style.css", "index.html"])
+            self.assertIn("New Index", read_file(os.path.join(dest_path, "index.html")))
+
+    @patch("builtins.print")
+    def test_build_site_rebuilds_source_replaced_by_older_copy(self, mock_print):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            static_dir = os.path.join(tmp_dir, "static")
+            content_dir = os.path.join(tmp_dir, "content")
+            dest_path = os.path.join(tmp_dir, "public")
+            os.makedirs(static_dir)
+            os.makedirs(content_dir)
+            index_path = os.path.join(content_dir, "index.md")
+            with open(index_path, "w") as f:
+                f.write("# Index")
+
+            build_function = build_site(
+                static_dir, content_dir, self.template_path, dest_path
+            )
+            build_function()
+
+            # e.g. restored from a backup with cp -p
+            with open(index_path, "a") as f:
+                f.write("\n\nRestored")
+            past = os.stat(index_path).st_mtime - 1
+            os.utime(index_path, (past, past))
+            build_function()
+
+            self.assertIn("Restored", read_file(os.path.join(dest_path, "index.html")))
+
+    @patch("builtins.print")
+    @patch("src.core.utils.remove_stale_files")
+    @patch("src.core.utils.generate_page_recursive", return_value=[])
+    @patch("src.core.utils.copy_static_to_public", return_value=set())
+    @patch("src.core.utils.prune_cache")
+    def test_build_site_prunes_cache_once(
+        self,
+        mock_prune_cache,
+        mock_copy_static,
+        mock_generate_page_recursive,
+        mock_remove_stale_files,
+        mock_print,
+    ):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            content_dir = os.path.join(tmp_dir, "content")
+            cache_dir = os.path.join(tmp_dir, "cache")
+            os.makedirs(content_dir)
+            with open(os.path.join(content_dir, "index.md"), "w") as f:
+                f.write("# Index")
+
+            build_function = build_site(
+                self.static_dir,
+                content_dir,
+                self.template_path,
+                self.dest_path,
+                cache_dir=cache_dir,
+            )
+            build_function()
+            build_function()
+
+            mock_prune_cache.assert_called_once()
+            pruned_cache_dir, bodies = mock_prune_cache.call_args.args
+            self.assertEqual(pruned_cache_dir, cache_dir)
+            self.assertEqual(list(bodies), ["# Index"])
+
 
 if __name__ == "__main__":
     unittest.main()